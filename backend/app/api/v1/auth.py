@@ -2,29 +2,52 @@ from fastapi import APIRouter, HTTPException, status
 from pymongo.errors import DuplicateKeyError
 
 from app.core import database
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.user_cache import get_user_by_email, invalidate_user
+from app.core.security import create_access_token
+from app.core.password_pool import (
+    PasswordPoolSaturated,
+    hash_password_async,
+    verify_password_async,
+)
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.models.user import UserModel
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
+
+
+def _password_pool_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry",
+        headers={"Retry-After": str(PasswordPoolSaturated.retry_after_seconds)}
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(payload: UserCreate):
+async def register_user(payload: UserCreate):
     users = database.get_user_collection()
 
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except PasswordPoolSaturated:
+        raise _password_pool_busy()
+
     user = UserModel(
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
         role="user"
     )
 
     try:
-        result = users.insert_one(user.to_dict())
+        result = await users.insert_one(user.to_dict())
     except DuplicateKeyError:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered"
         )
 
+    invalidate_user(email=user.email)
+
     return {
         "id": str(result.inserted_id),
         "email": user.email,
@@ -32,25 +55,31 @@ def register_user(payload: UserCreate):
         "created_at": user.created_at
     }
 @router.post("/login")
-def login_user(payload: UserLogin):
-    users = database.get_user_collection()
-
-    user = users.find_one({"email": payload.email})
+async def login_user(payload: UserLogin):
+    user = await get_user_by_email(payload.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    if not verify_password(payload.password, user["password_hash"]):
+    try:
+        password_ok = await verify_password_async(payload.password, user["password_hash"])
+    except PasswordPoolSaturated:
+        raise _password_pool_busy()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
+    # email + token version let AUTH_MODE=claims serve requests without a user lookup
     token = create_access_token({
         "sub": str(user["_id"]),
-        "role": user["role"]
+        "role": user["role"],
+        "email": user["email"],
+        "ver": user.get("token_version", 0)
     })
 
     return {"access_token": token, "token_type": "bearer"}
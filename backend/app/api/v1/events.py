@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core import events
+from app.core.config import settings
+from app.services import note_service, task_services
+from app.utils.dependencies import get_current_user
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+class EventStreamResponse(StreamingResponse):
+    """Releases its subscription however the response ends.
+
+    ``events.stream`` unsubscribes in its own ``finally``, but only once
+    iteration has started; a client gone before the body is iterated, or a
+    failing response start, would otherwise leak the subscription.
+    """
+
+    def __init__(self, subscription: events.Subscription):
+        super().__init__(
+            events.stream(subscription, settings.EVENTS_HEARTBEAT_SECONDS),
+            media_type="text/event-stream",
+            # no caching, and no buffering by nginx-style proxies
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            events.bus.unsubscribe(self.subscription)
+
+
+@router.get("")
+async def stream_events(current_user=Depends(get_current_user)):
+    """Server-Sent Events: ``changed`` with {"resource": "tasks"|"notes"} when a listing the caller reads changes"""
+    scopes = note_service.note_list_scopes(current_user) + task_services.task_list_scopes(current_user)
+    subscription = events.bus.subscribe(scopes)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event subscribers on this worker",
+            headers={"Retry-After": str(settings.EVENTS_RETRY_MS // 1000)}
+        )
+
+    return EventStreamResponse(subscription)
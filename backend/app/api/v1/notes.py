@@ -1,73 +1,79 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
 from bson import ObjectId
 from bson.errors import InvalidId
 
-from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse
+from app.schemas.note import NoteCreate, NoteDelta, NoteUpdate, NoteResponse
+from app.core.config import settings
 from app.utils.dependencies import get_current_user
-from app.services import note_service
-from app.core import database
+from app.utils.http_cache import cache_headers, etag_matches, listing_etag, not_modified
+from app.utils.pagination import NEXT_CURSOR_HEADER, next_cursor
+from app.utils.serialization import encode_items, json_response, note_response, owner_emails
+from app.utils.streaming import stream_format, stream_response
+from app.services import note_service, sync_service
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
+
+async def _encode_notes(notes):
+    owners = await owner_emails(notes)
+    return encode_items([note_response(note, owners) for note in notes], NoteResponse)
+
+
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
-def create_note(
+async def create_note(
     payload: NoteCreate,
     current_user=Depends(get_current_user)
 ):
-    note_id = note_service.create_note(payload, current_user)
-    
-    # Fetch the created note to get the actual created_at timestamp
-    note = note_service.get_note_by_id(note_id, current_user)
-
-    # Fetch owner email
-    owner = database.get_user_collection().find_one({"_id": note["owner_id"]})
-    owner_email = owner["email"] if owner else None
-
-    return {
-        "id": str(note["_id"]),
-        "title": note["title"],
-        "content": note["content"],
-        "owner_id": str(note["owner_id"]),
-        "owner_email": owner_email,
-        "visibility": note.get("visibility", "private"),
-        "created_at": note["created_at"]
-    }
+    # The inserted document already has everything the response needs,
+    # including the owner email taken from current_user - one round trip
+    note = await note_service.create_note(payload, current_user)
+
+    return note_response(note, {})
 
 @router.get("", response_model=list[NoteResponse])
-def get_notes(current_user=Depends(get_current_user)):
-    notes = note_service.get_notes(current_user)
-    users_col = database.get_user_collection()
-
-    # Get all unique owner IDs (they are ObjectId objects from MongoDB)
-    # Filter out any invalid owner_ids and ensure we only have ObjectIds
-    owner_ids_set = set()
-    for note in notes:
-        owner_id = note.get("owner_id")
-        if owner_id:
-            # owner_id from MongoDB should be an ObjectId
-            if isinstance(owner_id, ObjectId):
-                owner_ids_set.add(owner_id)
-    
-    owner_ids = list(owner_ids_set)
-    
-    # Fetch all owner emails in one query for efficiency (only if we have owner_ids)
-    owners = {}
-    if owner_ids:
-        for owner in users_col.find({"_id": {"$in": owner_ids}}):
-            owners[str(owner["_id"])] = owner.get("email")
-
-    return [
-        {
-            "id": str(note["_id"]),
-            "title": note["title"],
-            "content": note["content"],
-            "owner_id": str(note.get("owner_id", "")),
-            "owner_email": owners.get(str(note.get("owner_id", ""))) if isinstance(note.get("owner_id"), ObjectId) else None,
-            "visibility": note.get("visibility", "private"),
-            "created_at": note["created_at"]
-        }
-        for note in notes
-    ]
+async def get_notes(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=settings.NOTES_MAX_PAGE_SIZE),
+    after: str | None = Query(None, description=f"Cursor from the previous page's {NEXT_CURSOR_HEADER} header"),
+    stream: bool = Query(False, description="Stream a JSON array (or NDJSON with Accept: application/x-ndjson)"),
+    since: str | None = Query(None, description=f"Sync token from a previous {sync_service.SYNC_TOKEN_HEADER} header or delta"),
+    current_user=Depends(get_current_user)
+):
+    # Unchanged since the client's copy: answer from the change counters alone
+    etag = await listing_etag(request, note_service.note_list_scopes(current_user))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if since:
+        # Delta sync: only what changed, was deleted or became invisible after the token
+        delta = await note_service.get_note_changes(current_user, since, limit or settings.SYNC_PAGE_SIZE)
+        owners = await owner_emails(delta["changed"])
+        delta["changed"] = [note_response(note, owners) for note in delta["changed"]]
+        return json_response(delta, NoteDelta, cache_headers(etag))
+
+    # Taken before reading, so a later ?since= sees anything written meanwhile
+    sync_token = sync_service.issue_token()
+
+    fmt = stream_format(request, stream)
+    if fmt:
+        notes = note_service.iter_notes(current_user, limit, after)
+        response = stream_response(notes, _encode_notes, fmt)
+        response.headers.update(cache_headers(etag))
+        response.headers[sync_service.SYNC_TOKEN_HEADER] = sync_token
+        return response
+
+    # Unpaginated unless a limit is given, as before
+    notes = await note_service.get_notes(current_user, limit, after)
+
+    cursor = next_cursor(notes, limit)
+    headers = cache_headers(etag)
+    headers[sync_service.SYNC_TOKEN_HEADER] = sync_token
+    if cursor:
+        headers[NEXT_CURSOR_HEADER] = cursor
+
+    owners = await owner_emails(notes)
+
+    return json_response([note_response(note, owners) for note in notes], list[NoteResponse], headers)
 
 # @router.put("/{note_id}")
 # def update_note(
@@ -79,7 +85,7 @@ def get_notes(current_user=Depends(get_current_user)):
 #     return {"message": "Note updated successfully"}
 
 @router.patch("/{note_id}")
-def update_note(
+async def update_note(
     note_id: str,
     payload: NoteUpdate,
     current_user=Depends(get_current_user)
@@ -91,13 +97,13 @@ def update_note(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid note ID format: {note_id}"
         )
-    note_service.update_note(object_id, payload, current_user)
+    await note_service.update_note(object_id, payload, current_user)
     return {"message": "Note updated successfully"}
 
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_note(
+async def delete_note(
     note_id: str,
     current_user=Depends(get_current_user)
 ):
@@ -108,7 +114,7 @@ def delete_note(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid note ID format: {note_id}"
         )
-    note_service.delete_note(object_id, current_user)
+    await note_service.delete_note(object_id, current_user)
 
 
 
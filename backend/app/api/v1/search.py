@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query, Request
+
+from app.core.config import settings
+from app.schemas.search import SearchMode, SearchResponse, SearchType
+from app.services import note_service, task_services
+from app.utils.dependencies import get_current_user
+from app.utils.http_cache import cache_headers, etag_matches, listing_etag, not_modified
+from app.utils.serialization import json_response, note_response, owner_emails, task_response
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+def _with_score(item: dict, doc: dict) -> dict:
+    item["score"] = doc.get("score")
+    return item
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    type: SearchType = SearchType.all,
+    mode: SearchMode = SearchMode.text,
+    status: str | None = Query(None, description="Tasks only"),
+    limit: int = Query(settings.SEARCH_PAGE_SIZE, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=settings.SEARCH_MAX_OFFSET),
+    current_user=Depends(get_current_user)
+):
+    want_notes = type in (SearchType.all, SearchType.notes)
+    want_tasks = type in (SearchType.all, SearchType.tasks)
+
+    # Results only change when one of the listings searched does
+    scopes = []
+    if want_notes:
+        scopes += note_service.note_list_scopes(current_user)
+    if want_tasks:
+        scopes += task_services.task_list_scopes(current_user)
+    etag = await listing_etag(request, scopes)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    notes, tasks = [], []
+    if want_notes:
+        notes = await note_service.search_notes(current_user, q, mode.value, limit, offset)
+    if want_tasks:
+        tasks = await task_services.search_tasks(current_user, q, mode.value, status, limit, offset)
+
+    # Both services return one extra row to tell whether another page exists
+    has_more = len(notes) > limit or len(tasks) > limit
+    notes, tasks = notes[:limit], tasks[:limit]
+
+    owners = await owner_emails(notes)
+    content = {
+        "notes": [_with_score(note_response(note, owners), note) for note in notes],
+        "tasks": [_with_score(task_response(task), task) for task in tasks],
+        "next_offset": offset + limit if has_more else None,
+    }
+    return json_response(content, SearchResponse, cache_headers(etag))
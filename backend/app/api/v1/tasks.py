@@ -1,45 +1,143 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from bson import ObjectId
-
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse
+from bson.errors import InvalidId
+
+from app.schemas.task import (
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+    JobResponse,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskDelta,
+    TaskStatsResponse,
+)
 from app.utils.dependencies import get_current_user
-from app.services import task_services
+from app.utils.http_cache import cache_headers, etag_matches, listing_etag, not_modified
+from app.utils.pagination import NEXT_CURSOR_HEADER, next_cursor
+from app.utils.serialization import encode_items, json_response, task_response
+from app.utils.streaming import stream_format, stream_response
+from app.services import task_services, job_service, sync_service
 from app.core import database
+from app.core.config import settings
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+
+async def _encode_tasks(tasks):
+    return encode_items([task_response(task) for task in tasks], TaskResponse)
+
+
 @router.post("", status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
+    request: Request,
     payload: TaskCreate,
+    background: bool = Query(False, description="Admin assign-to-all only: return 202 and run as a job"),
     current_user=Depends(get_current_user)
 ):
-    count = task_services.create_task(payload, current_user)
+    if background and current_user["role"] == "admin" and not payload.assignee_id:
+        job_id = await task_services.start_assign_to_all_users(payload, current_user)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "job_id": str(job_id),
+                "status_url": request.url_for("get_job", job_id=str(job_id)).path
+            }
+        )
+
+    count = await task_services.create_task(payload, current_user)
 
     return {
         "message": f"{count} task(s) created successfully"
     }
 
+@router.post(":batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    payload: TaskBatchRequest,
+    current_user=Depends(get_current_user)
+):
+    """Apply up to 1000 mixed create/update/delete operations; per-item results"""
+    results = await task_services.apply_task_batch(payload.operations, current_user)
+    return {"results": results}
+
+
+@router.get("/stats", response_model=TaskStatsResponse)
+async def get_task_stats(
+    request: Request,
+    current_user=Depends(get_current_user)
+):
+    """Per-status counts of the caller's tasks (every task for admins)"""
+    version, stats = await task_services.get_task_stats(current_user)
+
+    etag = version if settings.HTTP_ETAGS else None
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return json_response(stats, TaskStatsResponse, cache_headers(etag))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user=Depends(get_current_user)
+):
+    try:
+        object_id = ObjectId(job_id)
+    except (InvalidId, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid job ID format: {job_id}"
+        )
+
+    job = await job_service.get_job(object_id, current_user)
+    return {"id": str(job["_id"]), **job}
+
+
 @router.get("", response_model=list[TaskResponse])
-def get_tasks(
+async def get_tasks(
+    request: Request,
     status: str | None = None,
+    limit: int | None = Query(None, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    after: str | None = Query(None, description=f"Cursor from the previous page's {NEXT_CURSOR_HEADER} header"),
+    stream: bool = Query(False, description="Stream a JSON array (or NDJSON with Accept: application/x-ndjson)"),
+    since: str | None = Query(None, description=f"Sync token from a previous {sync_service.SYNC_TOKEN_HEADER} header or delta"),
     current_user=Depends(get_current_user)
 ):
-    tasks = task_services.get_tasks(current_user, status)
-
-    return [
-        {
-            "id": str(task["_id"]),
-            "title": task["title"],
-            "description": task.get("description"),
-            "status": task["status"],
-            "owner_id": str(task["owner_id"]),
-            "created_at": task["created_at"],
-            "updated_at": task.get("updated_at"),
-        "updated_by": (
-            str(task["updated_by"]) if task.get("updated_by") else None),
-        }
-        for task in tasks
-    ]
+    # Unchanged since the client's copy: answer from the change counters alone
+    etag = await listing_etag(request, task_services.task_list_scopes(current_user))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if since:
+        # Delta sync: only what changed or was deleted after the token
+        delta = await task_services.get_task_changes(current_user, since, limit or settings.SYNC_PAGE_SIZE)
+        delta["changed"] = [task_response(task) for task in delta["changed"]]
+        return json_response(delta, TaskDelta, cache_headers(etag))
+
+    # Taken before reading, so a later ?since= sees anything written meanwhile
+    sync_token = sync_service.issue_token()
+
+    # Streaming sends the whole result set unless a limit is given explicitly
+    fmt = stream_format(request, stream)
+    if fmt:
+        tasks = task_services.iter_tasks(current_user, status, limit, after)
+        response = stream_response(tasks, _encode_tasks, fmt)
+        response.headers.update(cache_headers(etag))
+        response.headers[sync_service.SYNC_TOKEN_HEADER] = sync_token
+        return response
+
+    # Unpaginated unless asked for, as before; a bare cursor gets the default page size
+    if after and not limit:
+        limit = settings.TASKS_PAGE_SIZE
+    tasks = await task_services.get_tasks(current_user, status, limit, after)
+
+    cursor = next_cursor(tasks, limit)
+    headers = cache_headers(etag)
+    headers[sync_service.SYNC_TOKEN_HEADER] = sync_token
+    if cursor:
+        headers[NEXT_CURSOR_HEADER] = cursor
+
+    return json_response([task_response(task) for task in tasks], list[TaskResponse], headers)
 
 
 # @router.put("/{task_id}")
@@ -56,12 +154,12 @@ def get_tasks(
 #     return {"message": "Task updated successfully"}
 
 @router.patch("/{task_id}")
-def update_task(
+async def update_task(
     task_id: str,
     payload: TaskUpdate,
     current_user=Depends(get_current_user)
 ):
-    task_services.update_task(
+    await task_services.update_task(
         ObjectId(task_id),
         payload,
         current_user
@@ -72,11 +170,11 @@ def update_task(
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: str,
     current_user=Depends(get_current_user)
 ):
-    task_services.delete_task(ObjectId(task_id), current_user)
+    await task_services.delete_task(ObjectId(task_id), current_user)
 
 
 
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
 from app.utils.dependencies import get_current_user, require_role
-from app.schemas.user import UserResponse
+from app.schemas.user import UserEmailUpdate, UserResponse
 from app.core import database
+from app.core.revocation import revoke_user_tokens
+from app.core.user_cache import invalidate_user
+from app.services import note_service
 from typing import List
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me")
-def read_me(current_user=Depends(get_current_user)):
+async def read_me(current_user=Depends(get_current_user)):
     return {
         "id": str(current_user["_id"]),
         "email": current_user["email"],
@@ -17,10 +24,10 @@ def read_me(current_user=Depends(get_current_user)):
 
 
 @router.get("", response_model=List[UserResponse])
-def get_all_users(admin=Depends(require_role("admin"))):
+async def get_all_users(admin=Depends(require_role("admin"))):
     """Get all users (Admin only)"""
     users_col = database.get_user_collection()
-    users = users_col.find({})
+    users = await users_col.find({}).to_list(None)
     
     return [
         {
@@ -33,6 +40,72 @@ def get_all_users(admin=Depends(require_role("admin"))):
     ]
 
 
+@router.post("/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(user_id: str, admin=Depends(require_role("admin"))):
+    """Invalidate every token issued to a user (Admin only)"""
+    try:
+        object_id = ObjectId(user_id)
+    except (InvalidId, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid user ID format: {user_id}"
+        )
+
+    if not await revoke_user_tokens(object_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+
+@router.patch("/{user_id}/email", status_code=status.HTTP_202_ACCEPTED)
+async def change_email(
+    user_id: str,
+    payload: UserEmailUpdate,
+    request: Request,
+    admin=Depends(require_role("admin"))
+):
+    """Change a user's email and propagate it to their notes as a job (Admin only)"""
+    try:
+        object_id = ObjectId(user_id)
+    except (InvalidId, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid user ID format: {user_id}"
+        )
+
+    try:
+        previous = await database.get_user_collection().find_one_and_update(
+            {"_id": object_id},
+            {"$set": {"email": payload.email}},
+            projection={"email": 1}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already registered"
+        )
+
+    if not previous:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    invalidate_user(user_id=object_id, email=previous["email"])
+    # Tokens carry the email claim, so make the user log in again
+    await revoke_user_tokens(object_id)
+
+    job_id = await note_service.start_owner_email_propagation(object_id, payload.email, admin)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "job_id": str(job_id),
+            "status_url": request.url_for("get_job", job_id=str(job_id)).path
+        }
+    )
+
+
 @router.get("/admin-only")
-def admin_only(admin=Depends(require_role("admin"))):
+async def admin_only(admin=Depends(require_role("admin"))):
     return {"message": "Welcome admin"}
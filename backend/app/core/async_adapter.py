@@ -0,0 +1,170 @@
+"""
+Async facade over a blocking PyMongo client.
+
+Exposes the subset of the Motor API the services rely on (awaitable
+collection methods, ``find``/``aggregate`` cursors with ``to_list`` and
+``async for``) so the rest of the app is written once against ``await``.
+Every blocking call goes through ``runner`` - AnyIO worker threads by
+default - which keeps the event loop free but leaves concurrency capped by
+the thread limiter, exactly like the old sync routes.
+"""
+from functools import partial
+from itertools import islice
+
+from anyio import to_thread
+
+
+DEFAULT_BATCH_SIZE = 101
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    return await to_thread.run_sync(partial(fn, *args, **kwargs))
+
+
+class AsyncCursorAdapter:
+    def __init__(self, open_cursor, runner):
+        self._open_cursor = open_cursor
+        self._runner = runner
+        self._cursor = None
+        self._modifiers = []
+        self._batch_size = DEFAULT_BATCH_SIZE
+
+    def _chain(self, name, *args, **kwargs):
+        self._modifiers.append((name, args, kwargs))
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self._chain("sort", *args, **kwargs)
+
+    def skip(self, count):
+        return self._chain("skip", count)
+
+    def limit(self, count):
+        return self._chain("limit", count)
+
+    def hint(self, index):
+        return self._chain("hint", index)
+
+    def batch_size(self, size):
+        self._batch_size = size or DEFAULT_BATCH_SIZE
+        return self._chain("batch_size", size)
+
+    def _materialise(self):
+        if self._cursor is None:
+            cursor = self._open_cursor()
+            for name, args, kwargs in self._modifiers:
+                cursor = getattr(cursor, name)(*args, **kwargs)
+            self._cursor = cursor
+        return self._cursor
+
+    def _fetch(self, length):
+        cursor = self._materialise()
+        if length is None:
+            return list(cursor)
+        return list(islice(cursor, length))
+
+    async def to_list(self, length=None):
+        return await self._runner(self._fetch, length)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            batch = await self._runner(self._fetch, self._batch_size)
+            for document in batch:
+                yield document
+            if len(batch) < self._batch_size:
+                return
+
+    async def explain(self):
+        return await self._runner(lambda: self._materialise().explain())
+
+    async def close(self):
+        if self._cursor is not None:
+            await self._runner(self._cursor.close)
+
+
+class AsyncCollectionAdapter:
+    def __init__(self, collection, runner):
+        self._collection = collection
+        self._runner = runner
+
+    @property
+    def name(self):
+        return self._collection.name
+
+    @property
+    def delegate(self):
+        return self._collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursorAdapter(
+            partial(self._collection.find, *args, **kwargs), self._runner
+        )
+
+    def aggregate(self, pipeline, **kwargs):
+        return AsyncCursorAdapter(
+            partial(self._collection.aggregate, pipeline, **kwargs), self._runner
+        )
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return await self._runner(method, *args, **kwargs)
+
+        return call
+
+
+class AsyncDatabaseAdapter:
+    def __init__(self, database, runner):
+        self._database = database
+        self._runner = runner
+
+    @property
+    def name(self):
+        return self._database.name
+
+    @property
+    def delegate(self):
+        return self._database
+
+    def __getitem__(self, name):
+        return AsyncCollectionAdapter(self._database[name], self._runner)
+
+    def get_collection(self, name, **kwargs):
+        return AsyncCollectionAdapter(
+            self._database.get_collection(name, **kwargs), self._runner
+        )
+
+    async def command(self, *args, **kwargs):
+        return await self._runner(self._database.command, *args, **kwargs)
+
+    async def list_collection_names(self, **kwargs):
+        return await self._runner(self._database.list_collection_names, **kwargs)
+
+
+class AsyncClientAdapter:
+    def __init__(self, client, runner=run_in_thread):
+        self._client = client
+        self._runner = runner
+
+    @property
+    def delegate(self):
+        return self._client
+
+    @property
+    def admin(self):
+        return AsyncDatabaseAdapter(self._client.admin, self._runner)
+
+    def __getitem__(self, name):
+        return AsyncDatabaseAdapter(self._client[name], self._runner)
+
+    def get_database(self, name, **kwargs):
+        return AsyncDatabaseAdapter(
+            self._client.get_database(name, **kwargs), self._runner
+        )
+
+    def close(self):
+        self._client.close()
@@ -0,0 +1,55 @@
+"""
+Change counters behind the ETags of the listing endpoints.
+
+Every write path bumps the scopes whose listings it can change (e.g. the
+owner's tasks, or public notes); a listing's ETag is a hash of the current
+tokens of the scopes it reads plus the request itself. Answering a matching
+``If-None-Match`` therefore costs one ``_id`` lookup in ``change_counters``
+instead of the listing query and its serialisation, on every worker alike.
+
+Tokens are fresh ObjectIds rather than incrementing integers, so a dropped
+or reset counters collection can never bring back an old ETag.
+
+A read that lands between a write and its bump can be tagged with the
+previous token; the next poll after the bump sees the change.
+
+Bumps are also what ``app.core.events`` pushes to subscribed clients.
+"""
+import hashlib
+import logging
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core import database, events
+
+logger = logging.getLogger(__name__)
+
+
+async def bump(*scopes: str):
+    """Mark every listing that reads one of ``scopes`` as changed."""
+    scopes = set(scopes)
+    if not scopes:
+        return
+    try:
+        await database.db["change_counters"].bulk_write(
+            [UpdateOne({"_id": scope}, {"$set": {"v": ObjectId()}}, upsert=True) for scope in scopes],
+            ordered=False
+        )
+    except Exception:
+        # the write itself succeeded; a missed bump only delays clients seeing it
+        logger.exception("Bumping change counters %s failed", sorted(scopes))
+    events.publish_local(scopes)
+
+
+async def etag(scopes: list[str], *parts) -> str:
+    """Weak ETag over the current tokens of ``scopes`` and ``parts``."""
+    tokens = {}
+    async for doc in database.db["change_counters"].find({"_id": {"$in": scopes}}):
+        tokens[doc["_id"]] = str(doc["v"])
+
+    digest = hashlib.sha1()
+    for part in (*parts, *(f"{scope}={tokens.get(scope, 0)}" for scope in scopes)):
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()[:24]}"'
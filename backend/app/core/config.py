@@ -5,11 +5,120 @@ class Settings(BaseSettings):
     # Database
     MONGODB_URI: str
     DATABASE_NAME: str = "internship_db"
+    # "motor" = native async driver, "pymongo" = blocking driver run in worker threads
+    MONGO_DRIVER: str = "motor"
+    # Connection pool (per worker process)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0          # opened at startup, before the app serves requests
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int | None = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGO_COMPRESSORS: str | None = None  # e.g. "zstd,snappy" (pip install "pymongo[zstd,snappy]")
+    MONGO_READ_PREFERENCE: str = "primary"
+    # Index/seed migrations on boot; each runs once per database however many
+    # workers start (set false and use `python -m app.manage migrate` to own it)
+    RUN_MIGRATIONS_ON_STARTUP: bool = True
+    # A "running" marker not renewed for this long belongs to a dead worker and is re-claimed
+    MIGRATION_LEASE_SECONDS: int = 300
+    # How long a worker that lost the claim waits for "done" before failing its boot
+    MIGRATION_WAIT_SECONDS: int = 900
 
     # Auth / JWT
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
+    # "lookup" = load the user on every request, "claims" = trust verified token claims
+    AUTH_MODE: str = "lookup"
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
+    TOKEN_REVOCATION_MAX_ENTRIES: int = 10000
+
+    # Notes: read through the precomputed readers array instead of the visibility $or
+    # (run `python -m app.manage rebuild-note-readers` before enabling on old data)
+    NOTES_FANOUT_ON_WRITE: bool = False
+    # Owner emails on note reads: "cache" = user cache + one users $in query for
+    # the misses, "lookup" = $lookup join inside the notes aggregation,
+    # "denormalized" = the owner_email stored on each note (run
+    # `python -m app.manage rebuild-note-owner-emails` before enabling on old data)
+    NOTES_OWNER_EMAIL_SOURCE: str = "cache"
+
+    # Admin "assign to all users" task creation
+    TASK_FANOUT_BATCH_SIZE: int = 1000
+
+    # Pagination
+    TASKS_PAGE_SIZE: int = 100
+    TASKS_MAX_PAGE_SIZE: int = 1000
+    NOTES_MAX_PAGE_SIZE: int = 1000
+
+    # Delta sync (GET /tasks?since=, GET /notes?since=)
+    SYNC_PAGE_SIZE: int = 1000
+    SYNC_OVERLAP_SECONDS: int = 5
+    SYNC_TOMBSTONE_TTL_DAYS: int = 30
+
+    # GET /search: offset pages over ranked results, so deep offsets are capped
+    SEARCH_PAGE_SIZE: int = 20
+    SEARCH_MAX_PAGE_SIZE: int = 100
+    SEARCH_MAX_OFFSET: int = 1000
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_POOL_WORKERS: int = 2   # 0 = hash in the threadpool instead
+    PASSWORD_POOL_MAX_PENDING: int = 64
+
+    # User cache (per worker)
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 30
+
+    # GET /tasks/stats: per-worker cache of status counts, reused until the
+    # tasks' change counters move; the TTL only bounds a missed bump
+    TASK_STATS_CACHE_SECONDS: int = 60
+    TASK_STATS_CACHE_MAX_ENTRIES: int = 10000
+
+    # ETags on GET /tasks and GET /notes from per-scope change counters
+    HTTP_ETAGS: bool = True
+
+    # Token-bucket rate limits (tokens/second, bucket size), see middleware/rate_limit.py.
+    # Storage: "memory" (per worker) or "sqlite:///path/buckets.db" (shared by a host's workers)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_IP_RATE: float = 50
+    RATE_LIMIT_IP_BURST: int = 100
+    RATE_LIMIT_USER_RATE: float = 20
+    RATE_LIMIT_USER_BURST: int = 60
+    RATE_LIMIT_LOGIN_RATE: float = 0.2    # login/register per client: 1 every 5 s sustained
+    RATE_LIMIT_LOGIN_BURST: int = 10
+    RATE_LIMIT_EXPENSIVE_RATE: float = 1  # admin user listing, search
+    RATE_LIMIT_EXPENSIVE_BURST: int = 10
+    # Only behind a proxy that sets it; otherwise clients can pick their own IP
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+
+    # Load shedding: 503 before any work once a worker is overloaded (0 = off)
+    SHED_MAX_IN_FLIGHT: int = 500
+    SHED_MAX_LOOP_LAG_MS: int = 250
+    SHED_RETRY_AFTER_SECONDS: int = 1
+
+    # GET /events: "auto" = one change stream on change_counters per worker
+    # (needs a replica set and the motor driver), "local" = in-process only
+    EVENTS_SOURCE: str = "auto"
+    EVENTS_MAX_SUBSCRIBERS: int = 10000   # per worker; beyond that 503
+    EVENTS_QUEUE_SIZE: int = 16
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+    EVENTS_RETRY_MS: int = 5000
+
+    # Listing responses skip response_model validation and are encoded straight
+    # to JSON; set true in tests/staging to check every one against its schema
+    VALIDATE_RESPONSES: bool = False
+
+    # Observability: Mongo commands at least this slow are logged with their filter shape
+    SLOW_QUERY_MS: float = 100
+    # /readyz: ping at most every READINESS_CACHE_SECONDS, fail above the latency
+    # budget or when this worker's Mongo pool is this full
+    READINESS_CACHE_SECONDS: float = 2
+    READINESS_PING_BUDGET_MS: float = 250
+    READINESS_MAX_POOL_UTILIZATION: float = 0.9
+    # Shared directory where each uvicorn worker drops its metrics snapshot so
+    # /metrics aggregates all workers (leave unset for a single worker)
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 5
 
     # Admin
     ADMIN_EMAIL: str
@@ -1,18 +1,143 @@
-from pymongo import MongoClient
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, MongoClient
 from app.core.config import settings
+from app.core import metrics, query_stats
+from app.core.async_adapter import AsyncClientAdapter
 from datetime import datetime
-from app.core.security import hash_password
+from app.core.password_pool import hash_password_async
 
-client: MongoClient = None
+# Either a Motor client or a threaded adapter around PyMongo - both expose
+# the same awaitable API, so services never need to know which one is live.
+client = None
 db = None
 
+# collection -> [(keys, options)]; create_index is a no-op for existing indexes
+INDEXES = {
+    "users": [
+        ([("email", ASCENDING)], {"unique": True}),
+        ([("token_version_changed_at", ASCENDING)], {"sparse": True}),
+        # covers the _id-only scan in task_services.assign_to_all_users
+        ([("role", ASCENDING), ("_id", ASCENDING)], {}),
+    ],
+    "tasks": [
+        # GET /tasks keyset pages: per owner, per owner + status, admin-wide
+        ([("owner_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("owner_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # GET /tasks?since=: per owner and admin-wide
+        ([("owner_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+        ([("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+        # GET /search; a collection can only have one text index
+        ([("title", TEXT), ("description", TEXT)], {"weights": {"title": 3, "description": 1}}),
+    ],
+    "jobs": [
+        ([("created_at", ASCENDING)], {"expireAfterSeconds": 7 * 24 * 3600}),
+    ],
+    "tombstones": [
+        ([("kind", ASCENDING), ("deleted_at", ASCENDING)], {}),
+        # TTL on deleted_at: see ttl_indexes()
+    ],
+    "notes": [
+        # One index per branch of note_service.visible_notes_query
+        ([("owner_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("visibility", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # multikey: one entry per shared_with member
+        ([("shared_with", ASCENDING), ("visibility", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # NOTES_FANOUT_ON_WRITE: one multikey lookup on the precomputed readers
+        ([("readers", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # GET /notes?since=: scans only the notes changed since the token,
+        # filtering visibility on the way
+        ([("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+        # GET /search; a collection can only have one text index
+        ([("title", TEXT), ("content", TEXT)], {"weights": {"title": 3, "content": 1}}),
+    ],
+}
+
+
+def ttl_indexes() -> dict:
+    """collection -> [(field, expireAfterSeconds)] for TTLs taken from settings.
+
+    Kept out of INDEXES, and so out of the migration fingerprint: create_index
+    rejects an existing index with a different expireAfterSeconds
+    (IndexOptionsConflict), so ``ensure_ttl_indexes`` retunes them instead.
+    """
+    return {
+        "tombstones": [("deleted_at", settings.SYNC_TOMBSTONE_TTL_DAYS * 24 * 3600)],
+    }
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "event_listeners": [query_stats.listener, metrics.pool_listener],
+    }
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
+
+
+def create_client():
+    options = client_options()
+    if settings.MONGO_DRIVER == "motor":
+        return AsyncIOMotorClient(settings.MONGODB_URI, **options)
+    if settings.MONGO_DRIVER == "pymongo":
+        return AsyncClientAdapter(MongoClient(settings.MONGODB_URI, **options))
+    raise ValueError(f"Unsupported MONGO_DRIVER: {settings.MONGO_DRIVER!r}")
+
 
-def connect_to_mongo():
+def open_database():
     global client, db
-    client = MongoClient(settings.MONGODB_URI)
+    client = create_client()
     db = client[settings.DATABASE_NAME]
-    db["users"].create_index("email", unique=True)
-    seed_admin_user()
+    return db
+
+
+async def connect_to_mongo():
+    # Index creation and the admin seed moved to app.core.migrations
+    open_database()
+    await warm_up_pool()
+
+
+async def warm_up_pool():
+    """Open MONGO_MIN_POOL_SIZE connections before the first request needs them.
+
+    Concurrent pings each hold their own connection; this also fails startup
+    fast when no server is selectable.
+    """
+    count = max(settings.MONGO_MIN_POOL_SIZE, 1)
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(count)))
+
+
+async def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            await db[collection].create_index(keys, **options)
+    await ensure_ttl_indexes()
+
+
+async def ensure_ttl_indexes():
+    """Create the ``ttl_indexes()``, rebuilding any whose expiry setting changed."""
+    for collection, ttls in ttl_indexes().items():
+        col = db[collection]
+        existing = await col.index_information()
+        for field, seconds in ttls:
+            name = f"{field}_1"
+            index = existing.get(name)
+            if index is not None and index.get("expireAfterSeconds") != seconds:
+                # Drop and rebuild rather than collMod: the collection only holds one
+                # TTL's worth of documents, and works the same on every server/stand-in
+                await col.drop_index(name)
+                index = None
+            if index is None:
+                await col.create_index([(field, ASCENDING)], expireAfterSeconds=seconds)
 
 
 def close_mongo_connection():
@@ -23,17 +148,18 @@ def close_mongo_connection():
 def get_user_collection():
     return db["users"]
 
-def seed_admin_user():
+async def seed_admin_user():
     users = db["users"]
 
-    admin = users.find_one({"email": settings.ADMIN_EMAIL})
+    admin = await users.find_one({"email": settings.ADMIN_EMAIL})
     if admin:
         return
 
-    users.insert_one({
+    await users.insert_one({
         "email": settings.ADMIN_EMAIL,
-        "password_hash": hash_password(settings.ADMIN_PASSWORD),
+        "password_hash": await hash_password_async(settings.ADMIN_PASSWORD),
         "role": "admin",
+        "token_version": 0,
         "created_at": datetime.utcnow()
     })
 
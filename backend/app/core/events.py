@@ -0,0 +1,205 @@
+"""
+Push channel behind ``GET /api/v1/events`` (Server-Sent Events).
+
+Events are invalidations, not data: "tasks you can see changed", "notes you
+can see changed". A client answers one by re-fetching the listing with its
+ETag, so the payload never needs a visibility check of its own and a burst
+of writes collapses into one refetch.
+
+Routing reuses the change-counter scopes: every write path already bumps
+exactly the scopes of the listings it changes, and a subscriber listens on
+the scopes its own listings read (``note_list_scopes``, ``task_list_scopes``)
+- the same ownership and visibility rules, decided once at subscribe time.
+
+Scope changes reach the bus from a single change stream per worker on
+``change_counters``, so writes made on any worker are seen. Without change
+streams (standalone mongod, the PyMongo driver, EVENTS_SOURCE=local) they
+come straight from ``change_counters.bump`` in the same process, which only
+covers writes made by this worker.
+
+Each subscriber has a bounded queue. Pending events for the same resource
+are coalesced, so a slow reader holds at most one entry per resource; one
+whose queue still fills up is sent ``overflow`` and disconnected, and
+reconnects and refetches.
+"""
+import asyncio
+import json
+import logging
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core import database
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# $changeStream rejected: not a replica set / unknown stage (standalone, old server)
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+
+
+def resource_of(scope: str) -> str:
+    """"tasks" for "tasks:user:<id>", "notes" for "notes:public", ..."""
+    return scope.split(":", 1)[0]
+
+
+def format_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    def __init__(self, scopes: list[str], queue_size: int):
+        self.scopes = scopes
+        self.queue: asyncio.Queue[str] = asyncio.Queue(queue_size)
+        self.overflowed = False
+        self.closed = False
+        self._pending: set[str] = set()
+
+    def push(self, resource: str) -> bool:
+        """Queue ``resource`` unless already pending; False on overflow."""
+        if resource in self._pending:
+            return True
+        try:
+            self.queue.put_nowait(resource)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+        self._pending.add(resource)
+        return True
+
+    async def next(self, timeout: float) -> str | None:
+        """Next changed resource, or None after ``timeout`` seconds of quiet."""
+        if self.queue.empty():
+            # not wait_for: on 3.11 it can swallow a cancel that races a
+            # delivery, leaving a disconnected client's stream running
+            getter = asyncio.ensure_future(self.queue.get())
+            try:
+                done, _ = await asyncio.wait({getter}, timeout=timeout)
+            finally:
+                # a cancelled get() leaves its item in the queue for next time
+                if not getter.done():
+                    getter.cancel()
+            if not done:
+                return None
+            resource = getter.result()
+        else:
+            resource = self.queue.get_nowait()
+        self._pending.discard(resource)
+        return resource
+
+
+class EventBus:
+    def __init__(self, max_subscribers: int, queue_size: int):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._by_scope: dict[str, set[Subscription]] = {}
+        self.subscribers = 0
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self, scopes: list[str]) -> Subscription | None:
+        """None when this worker already serves ``max_subscribers``."""
+        if self.subscribers >= self.max_subscribers:
+            return None
+        subscription = Subscription(scopes, self.queue_size)
+        for scope in scopes:
+            self._by_scope.setdefault(scope, set()).add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription.closed:
+            return
+        subscription.closed = True
+        for scope in subscription.scopes:
+            subscribers = self._by_scope.get(scope)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_scope[scope]
+        self.subscribers -= 1
+
+    def publish(self, scopes):
+        """Fan a scope change out to every subscriber listening on it."""
+        for scope in scopes:
+            resource = resource_of(scope)
+            for subscription in self._by_scope.get(scope, ()):
+                self.published += 1
+                if not subscription.push(resource):
+                    self.overflows += 1
+
+
+class ChangeStreamWatcher:
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self.active = False
+
+    async def run(self):
+        resume_after = None
+        while True:
+            try:
+                async with database.db["change_counters"].watch(
+                    [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}],
+                    resume_after=resume_after
+                ) as stream:
+                    self.active = True
+                    async for change in stream:
+                        resume_after = stream.resume_token
+                        self.bus.publish([change["documentKey"]["_id"]])
+            except OperationFailure as exc:
+                if exc.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams unavailable (%s); events only cover this worker's writes", exc)
+                    self.active = False
+                    return
+                logger.exception("Change stream on change_counters failed; retrying")
+            except PyMongoError:
+                logger.exception("Change stream on change_counters failed; retrying")
+            # writes in the gap are published locally until the stream resumes
+            self.active = False
+            await asyncio.sleep(1)
+
+
+bus = EventBus(
+    max_subscribers=settings.EVENTS_MAX_SUBSCRIBERS,
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+)
+watcher = ChangeStreamWatcher(bus)
+_watch_task: asyncio.Task | None = None
+
+
+def publish_local(scopes):
+    """Called by ``change_counters.bump``; a live change stream delivers these itself."""
+    if not watcher.active:
+        bus.publish(scopes)
+
+
+async def stream(subscription: Subscription, heartbeat_seconds: float):
+    """SSE body for one subscriber; unsubscribes when the client goes away."""
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n".encode() + format_event("ready", {})
+        while True:
+            resource = await subscription.next(heartbeat_seconds)
+            if subscription.overflowed:
+                yield format_event("overflow", {})
+                return
+            if resource is None:
+                # comment line: keeps proxies from timing out an idle stream
+                yield b": keepalive\n\n"
+                continue
+            yield format_event("changed", {"resource": resource})
+    finally:
+        bus.unsubscribe(subscription)
+
+
+def start():
+    global _watch_task
+    if settings.EVENTS_SOURCE != "auto" or settings.MONGO_DRIVER != "motor":
+        return
+    _watch_task = asyncio.create_task(watcher.run())
+
+
+async def stop():
+    global _watch_task
+    if _watch_task:
+        _watch_task.cancel()
+        _watch_task = None
+    watcher.active = False
@@ -0,0 +1,318 @@
+"""
+Prometheus-style metrics without a client library.
+
+Metrics are plain dicts keyed by label values and updated without locks:
+nearly every update happens on the event loop thread, and the few made from
+driver threads (the Mongo pool listener) can at worst lose an increment under
+contention - a fair price for keeping the hot path to one dict write.
+
+Each uvicorn worker is its own process with its own registry. With
+METRICS_DIR set, every worker writes a JSON snapshot of its registry to
+``<METRICS_DIR>/<pid>.json`` every METRICS_FLUSH_SECONDS, and whichever
+worker serves ``/metrics`` sums the snapshots of all live workers. Without it
+``/metrics`` reports the serving worker alone.
+"""
+import asyncio
+import json
+import logging
+import os
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REGISTRY: list["Metric"] = []
+
+# Seconds; tuned for API latencies from sub-millisecond to a slow bcrypt login
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), collect=None):
+        """``collect`` (no labels) is read at scrape time instead of tracking updates."""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._collect = collect
+        self._values = {}
+        REGISTRY.append(self)
+
+    def samples(self) -> list:
+        if self._collect is not None:
+            return [[[], float(self._collect())]]
+        return [[list(labels), value] for labels, value in list(self._values.items())]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def value(self, *labels) -> float:
+        """This worker's current value (not aggregated across workers)."""
+        return self._values.get(labels, 0)
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            # per-bucket (non-cumulative) counts incl. +Inf, sum, count
+            state = self._values[labels] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+        state["counts"][bisect_left(self.buckets, value)] += 1
+        state["sum"] += value
+        state["count"] += 1
+
+    def samples(self) -> list:
+        return [
+            [list(labels), {"counts": list(state["counts"]), "sum": state["sum"], "count": state["count"]}]
+            for labels, state in list(self._values.items())
+        ]
+
+
+# -------------------------
+# Snapshots & multi-worker aggregation
+# -------------------------
+
+def snapshot() -> dict:
+    families = {}
+    for metric in REGISTRY:
+        try:
+            samples = metric.samples()
+        except Exception:
+            logger.exception("Collecting metric %s failed", metric.name)
+            continue
+        families[metric.name] = {
+            "type": metric.type,
+            "help": metric.help,
+            "labels": list(metric.labels),
+            "buckets": list(getattr(metric, "buckets", [])),
+            "samples": samples,
+        }
+    return families
+
+
+def merge(snapshots: list[dict]) -> dict:
+    """Sum samples with the same name and labels across worker snapshots."""
+    merged = {}
+    for families in snapshots:
+        for name, family in families.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif family["type"] == "histogram":
+                    target["samples"][key] = {
+                        "counts": [a + b for a, b in zip(current["counts"], value["counts"])],
+                        "sum": current["sum"] + value["sum"],
+                        "count": current["count"] + value["count"],
+                    }
+                else:
+                    target["samples"][key] = current + value
+    return merged
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f"{pid}.json")
+
+
+def write_snapshot():
+    path = _snapshot_path(os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(snapshot(), fh)
+    os.replace(tmp, path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect() -> dict:
+    """Merged metrics of every live worker (or just this one without METRICS_DIR)."""
+    if not settings.METRICS_DIR:
+        return merge([snapshot()])
+
+    write_snapshot()
+    snapshots = []
+    for filename in os.listdir(settings.METRICS_DIR):
+        stem, ext = os.path.splitext(filename)
+        if ext != ".json" or not stem.isdigit():
+            continue
+        path = os.path.join(settings.METRICS_DIR, filename)
+        if not _alive(int(stem)):
+            # a dead worker's counters reset with it, as Prometheus expects
+            os.remove(path)
+            continue
+        try:
+            with open(path) as fh:
+                snapshots.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return merge(snapshots)
+
+
+# -------------------------
+# Text exposition
+# -------------------------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(merged: dict) -> str:
+    lines = []
+    for name, family in sorted(merged.items()):
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in sorted(family["samples"].items()):
+            if family["type"] == "histogram":
+                cumulative = 0
+                bounds = [*family["buckets"], "+Inf"]
+                for bound, count in zip(bounds, value["counts"]):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_label_str(family['labels'], labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_label_str(family['labels'], labels)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_label_str(family['labels'], labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_label_str(family['labels'], labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Flush loop (multi-worker)
+# -------------------------
+
+_flush_task: asyncio.Task | None = None
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        try:
+            write_snapshot()
+        except Exception:
+            logger.exception("Writing metrics snapshot failed")
+
+
+def start():
+    global _flush_task
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    write_snapshot()
+    _flush_task = asyncio.create_task(_flush_loop())
+
+
+def stop():
+    global _flush_task
+    if _flush_task:
+        _flush_task.cancel()
+        _flush_task = None
+        try:
+            os.remove(_snapshot_path(os.getpid()))
+        except OSError:
+            pass
+
+
+# -------------------------
+# HTTP & Mongo pool metrics
+# -------------------------
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"),
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+http_rejected = Counter(
+    "http_rejected_total", "Requests refused by rate limits or load shedding", ("reason",)
+)
+
+mongo_pool_checked_out = Gauge("mongo_pool_checked_out", "Mongo connections currently checked out")
+mongo_pool_checkouts = Counter("mongo_pool_checkouts_total", "Mongo connection checkouts")
+mongo_pool_checkout_failures = Counter(
+    "mongo_pool_checkout_failures_total", "Failed Mongo connection checkouts", ("reason",)
+)
+mongo_pool_connections = Gauge("mongo_pool_connections", "Open Mongo connections")
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def connection_checked_out(self, event):
+        mongo_pool_checked_out.inc()
+        mongo_pool_checkouts.inc()
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec()
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc(str(event.reason))
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc()
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+pool_listener = PoolMetricsListener()
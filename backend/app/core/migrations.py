@@ -0,0 +1,149 @@
+"""
+One-time, idempotent startup work (index plan, admin seed).
+
+Each migration is recorded in ``schema_migrations`` under a unique ``_id``.
+A worker claims a migration by inserting its marker; the unique ``_id``
+means exactly one of N booting workers wins, and once it is done every later
+boot costs a single query. A failed migration removes its marker so the next
+boot retries it.
+
+Workers that lose the claim wait (up to MIGRATION_WAIT_SECONDS) for the
+marker to reach "done" before going on, so nobody serves traffic against a
+half-migrated schema. The winner renews ``claimed_at`` while it works; a
+"running" marker older than MIGRATION_LEASE_SECONDS was left by a worker
+that died mid-migration, and the next worker to see it takes it over.
+
+The index migration's id embeds a fingerprint of ``database.INDEXES``, so
+editing the index plan makes it run again on the next deploy. TTLs that come
+from settings (``database.ttl_indexes``) have their own migration whose id
+embeds their values, so changing e.g. SYNC_TOMBSTONE_TTL_DAYS rebuilds just
+that index.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.core import database
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def index_fingerprint() -> str:
+    plan = json.dumps(database.INDEXES, sort_keys=True, default=str)
+    return hashlib.sha256(plan.encode()).hexdigest()[:12]
+
+
+def ttl_fingerprint() -> str:
+    plan = json.dumps(database.ttl_indexes(), sort_keys=True)
+    return hashlib.sha256(plan.encode()).hexdigest()[:12]
+
+
+def migrations():
+    """(id, coroutine function) in the order they must run."""
+    return [
+        (f"indexes-{index_fingerprint()}", database.ensure_indexes),
+        (f"ttl-indexes-{ttl_fingerprint()}", database.ensure_ttl_indexes),
+        ("seed-admin-user", database.seed_admin_user),
+    ]
+
+
+# How often a waiting worker re-reads the marker
+POLL_SECONDS = 1.0
+
+
+async def _claim(col, migration_id: str, token: ObjectId) -> bool:
+    """Take ``migration_id`` - fresh, or abandoned by a dead worker."""
+    now = datetime.utcnow()
+    try:
+        await col.insert_one({
+            "_id": migration_id, "status": "running", "claimed_by": token,
+            "claimed_at": now, "started_at": now,
+        })
+        return True
+    except DuplicateKeyError:
+        pass
+
+    expired = now - timedelta(seconds=settings.MIGRATION_LEASE_SECONDS)
+    stale = await col.find_one_and_update(
+        {"_id": migration_id, "status": "running", "$or": [
+            {"claimed_at": {"$lt": expired}},
+            # markers written before leases existed
+            {"claimed_at": {"$exists": False}, "started_at": {"$lt": expired}},
+        ]},
+        {"$set": {"claimed_by": token, "claimed_at": now, "started_at": now}}
+    )
+    if stale is None:
+        return False
+    logger.warning("Re-claimed migration %s abandoned since %s", migration_id, stale.get("claimed_at", stale.get("started_at")))
+    return True
+
+
+async def _wait_for(col, migration_id: str, token: ObjectId) -> bool:
+    """Block until another worker finishes ``migration_id``.
+
+    Returns True if the other worker died (or failed) and this one claimed
+    the migration instead; raises once MIGRATION_WAIT_SECONDS have passed.
+    """
+    deadline = time.monotonic() + settings.MIGRATION_WAIT_SECONDS
+    while True:
+        marker = await col.find_one({"_id": migration_id}, {"status": 1})
+        if marker is not None and marker.get("status") == "done":
+            return False
+        if await _claim(col, migration_id, token):
+            return True
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Timed out waiting for migration {migration_id} to finish on another worker")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+async def _keep_claim(col, migration_id: str, token: ObjectId):
+    """Renew the lease while the migration runs, however long it takes."""
+    while True:
+        await asyncio.sleep(settings.MIGRATION_LEASE_SECONDS / 3)
+        await col.update_one(
+            {"_id": migration_id, "claimed_by": token},
+            {"$set": {"claimed_at": datetime.utcnow()}}
+        )
+
+
+async def run_pending() -> list[str]:
+    """Run every migration not yet done; returns the ids this call ran.
+
+    Returns only once every migration is done, by this worker or another.
+    """
+    col = database.db["schema_migrations"]
+    done = {doc["_id"] async for doc in col.find({"status": "done"}, {"_id": 1})}
+    token = ObjectId()
+    ran = []
+
+    for migration_id, migrate in migrations():
+        if migration_id in done:
+            continue
+
+        if not await _claim(col, migration_id, token) and not await _wait_for(col, migration_id, token):
+            continue  # finished by another worker
+
+        renewal = asyncio.create_task(_keep_claim(col, migration_id, token))
+        try:
+            await migrate()
+        except Exception:
+            logger.exception("Migration %s failed", migration_id)
+            await col.delete_one({"_id": migration_id, "claimed_by": token})
+            raise
+        finally:
+            renewal.cancel()
+
+        await col.update_one(
+            {"_id": migration_id},
+            {"$set": {"status": "done", "finished_at": datetime.utcnow()}}
+        )
+        ran.append(migration_id)
+
+    return ran
@@ -0,0 +1,78 @@
+"""
+Bounded process pool for bcrypt hashing and verification.
+
+bcrypt costs 100-300 ms of CPU per call and holds the GIL, so running it in
+the request worker (or its threadpool) stalls every other request during a
+login storm. Password work is sent to PASSWORD_POOL_WORKERS separate
+processes instead. At most PASSWORD_POOL_MAX_PENDING calls may be queued or
+running; beyond that callers get ``PasswordPoolSaturated`` immediately and
+should answer 503 rather than pile up behind the pool.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+
+class PasswordPoolSaturated(Exception):
+    retry_after_seconds = 1
+
+
+def _warm_up():
+    return None
+
+
+class PasswordPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self):
+        if self.workers <= 0 or self._executor is not None:
+            return
+        # spawn, not fork: the parent already runs driver threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolSaturated()
+
+        self.pending += 1
+        try:
+            if self._executor is None:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            self.pending -= 1
+
+
+password_pool = PasswordPool(
+    workers=settings.PASSWORD_POOL_WORKERS,
+    max_pending=settings.PASSWORD_POOL_MAX_PENDING,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
@@ -0,0 +1,144 @@
+"""
+Per-request Mongo command statistics and the slow-query log.
+
+A PyMongo command listener (registered on the client in
+``database.create_client``) adds every command's duration and returned
+document count to the ``QueryStats`` of whatever request is current in a
+contextvar. Both Motor's executor and AnyIO's worker threads run driver
+calls in a copy of the caller's context, so the command lands on the request
+that issued it. ``middleware.query_stats`` opens one per request; tests and
+scripts can use ``track()`` directly:
+
+    with query_stats.track() as stats:
+        await note_service.create_note(payload, user)
+    assert stats.count == 1
+
+Commands slower than SLOW_QUERY_MS are logged on ``app.db`` with the shape
+of their filter (values replaced by "?"), never the values themselves.
+"""
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db")
+
+
+class QueryStats:
+    __slots__ = ("label", "count", "duration_ms", "docs")
+
+    def __init__(self, label: str | None = None):
+        self.label = label
+        self.count = 0
+        self.duration_ms = 0.0
+        self.docs = 0
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def track(label: str | None = None):
+    stats = QueryStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def record_command(duration_ms: float = 0.0, docs: int = 0):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration_ms += duration_ms
+        stats.docs += docs
+
+
+# -------------------------
+# Filter shapes
+# -------------------------
+
+def shape(value):
+    """``value`` with every literal replaced by "?" - keys and operators kept."""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [shape(item) for item in value]
+    return "?"
+
+
+def command_filter(command_name: str, command: dict):
+    """The part of a command that decides which documents it touches."""
+    if command_name in ("find", "count", "distinct"):
+        return command.get("filter", command.get("query"))
+    if command_name == "aggregate":
+        return command.get("pipeline")
+    if command_name == "findAndModify":
+        return command.get("query")
+    if command_name == "update":
+        return [update.get("q") for update in command.get("updates", [])]
+    if command_name == "delete":
+        return [delete.get("q") for delete in command.get("deletes", [])]
+    return None
+
+
+def returned_docs(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return 0
+
+
+# -------------------------
+# Listener
+# -------------------------
+
+class QueryStatsListener(monitoring.CommandListener):
+    def __init__(self):
+        # request_id -> (collection, filter) of commands in flight, for the slow log
+        self._pending = {}
+
+    def started(self, event):
+        command = event.command
+        collection_key = "collection" if event.command_name == "getMore" else event.command_name
+        self._pending[event.request_id] = (
+            command.get(collection_key),
+            command_filter(event.command_name, command),
+        )
+
+    def succeeded(self, event):
+        self._finish(event, returned_docs(event.command_name, event.reply))
+
+    def failed(self, event):
+        self._finish(event, 0)
+
+    def _finish(self, event, docs: int):
+        collection, query = self._pending.pop(event.request_id, (None, None))
+        duration_ms = event.duration_micros / 1000
+        record_command(duration_ms, docs)
+
+        if duration_ms >= settings.SLOW_QUERY_MS:
+            stats = _current.get()
+            logger.warning(
+                "slow_query command=%s collection=%s duration_ms=%.1f docs=%d request=%s filter=%s",
+                event.command_name,
+                collection,
+                duration_ms,
+                docs,
+                stats.label if stats else None,
+                json.dumps(shape(query)) if query is not None else None,
+            )
+
+
+listener = QueryStatsListener()
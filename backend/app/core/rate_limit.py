@@ -0,0 +1,157 @@
+"""
+Token buckets and load-shedding signals for ``middleware.rate_limit``.
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second; a request takes one token or is refused with the time until one is
+available. Each check is O(1): one dict operation in memory, or one UPSERT
+statement in SQLite.
+
+Storage (RATE_LIMIT_STORAGE):
+
+* ``memory`` - per worker; with N workers a client effectively gets N times
+  the limit. Buckets beyond RATE_LIMIT_MAX_KEYS are evicted least recently
+  used (an evicted client simply starts again with a full bucket).
+* ``sqlite:///path/buckets.db`` - one WAL-mode file shared by every worker
+  on the host, standing in for a shared store such as Redis. Statements run
+  inline on the event loop; a write lock held longer than 50 ms makes the
+  check fail open rather than stall the loop.
+
+``LoopLagMonitor`` measures how late the event loop wakes from a short
+sleep - the first sign a worker is overloaded, before latencies show it.
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Limit(NamedTuple):
+    rate: float    # tokens per second
+    burst: int     # bucket size
+
+
+IP_LIMIT = Limit(settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST)
+USER_LIMIT = Limit(settings.RATE_LIMIT_USER_RATE, settings.RATE_LIMIT_USER_BURST)
+LOGIN_LIMIT = Limit(settings.RATE_LIMIT_LOGIN_RATE, settings.RATE_LIMIT_LOGIN_BURST)
+EXPENSIVE_LIMIT = Limit(settings.RATE_LIMIT_EXPENSIVE_RATE, settings.RATE_LIMIT_EXPENSIVE_BURST)
+
+# (method, path) -> limit per client (user, else IP) on top of the global ones.
+# Login and register cost a bcrypt hash; the others are full scans or joins.
+ROUTE_LIMITS = {
+    ("POST", "/api/v1/auth/login"): LOGIN_LIMIT,
+    ("POST", "/api/v1/auth/register"): LOGIN_LIMIT,
+    ("GET", "/api/v1/users"): EXPENSIVE_LIMIT,
+    ("GET", "/api/v1/search"): EXPENSIVE_LIMIT,
+}
+
+
+class MemoryBuckets:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: str, limit: Limit) -> float:
+        """0 if a token was taken, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = limit.burst
+        else:
+            tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            self._buckets.move_to_end(key)
+
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / limit.rate
+
+
+class SQLiteBuckets:
+    # Refill, take and report in one atomic statement (SQLite >= 3.35 for RETURNING).
+    # SET expressions all see the row as it was before the update.
+    TAKE = """
+        INSERT INTO buckets (key, tokens, updated, ok) VALUES (:key, :burst - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:burst, tokens + (:now - updated) * :rate)
+                     - (min(:burst, tokens + (:now - updated) * :rate) >= 1),
+            ok = min(:burst, tokens + (:now - updated) * :rate) >= 1,
+            updated = :now
+        RETURNING ok, tokens
+    """
+    PRUNE_EVERY = 10000
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=0.05, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, ok INTEGER NOT NULL) "
+            "WITHOUT ROWID"
+        )
+        self._takes = 0
+        self.failures = 0
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = time.time()  # wall clock: shared between processes
+        try:
+            ok, tokens = self._conn.execute(
+                self.TAKE, {"key": key, "rate": limit.rate, "burst": limit.burst, "now": now}
+            ).fetchone()
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                # a bucket idle this long is full again anyway
+                self._conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 3600,))
+        except sqlite3.OperationalError:
+            self.failures += 1
+            return 0.0
+        return 0.0 if ok else (1 - tokens) / limit.rate
+
+
+def create_store(url: str):
+    if url == "memory":
+        return MemoryBuckets(settings.RATE_LIMIT_MAX_KEYS)
+    if url.startswith("sqlite:///"):
+        return SQLiteBuckets(url.removeprefix("sqlite:///"))
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE: {url!r}")
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag_ms = 0.0
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = (time.perf_counter() - started - self.interval) * 1000
+            # halve on every quiet tick so one hiccup does not shed for long
+            self.lag_ms = max(lag, self.lag_ms / 2)
+
+
+store = MemoryBuckets(settings.RATE_LIMIT_MAX_KEYS)
+loop_lag = LoopLagMonitor(interval=0.1)
+_lag_task: asyncio.Task | None = None
+
+
+def start():
+    global store, _lag_task
+    store = create_store(settings.RATE_LIMIT_STORAGE)
+    if settings.SHED_MAX_LOOP_LAG_MS:
+        _lag_task = asyncio.create_task(loop_lag.run())
+
+
+def stop():
+    global _lag_task
+    if _lag_task:
+        _lag_task.cancel()
+        _lag_task = None
+    loop_lag.lag_ms = 0.0
@@ -0,0 +1,88 @@
+"""
+Readiness probe for ``/readyz``.
+
+Unlike ``/health`` this does real I/O: a Mongo ``ping`` that must answer
+within READINESS_PING_BUDGET_MS. Orchestrators poll readiness often and from
+several places, so the result is cached for READINESS_CACHE_SECONDS and
+concurrent probes share one in-flight ping. The worker also reports itself
+unready when its connection pool or bcrypt pool is saturated, so it is taken
+out of rotation before requests start queueing on it.
+"""
+import asyncio
+import time
+
+from app.core import database, metrics
+from app.core.config import settings
+from app.core.password_pool import password_pool
+
+
+class ReadinessProbe:
+    def __init__(self, cache_seconds: float, budget_ms: float, max_pool_utilization: float):
+        self.cache_seconds = cache_seconds
+        self.budget_ms = budget_ms
+        self.max_pool_utilization = max_pool_utilization
+        self._ping: dict | None = None
+        self._pinged_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _run_ping(self) -> dict:
+        if database.client is None:
+            return {"ok": False, "error": "not connected"}
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(database.client.admin.command("ping"), self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"ping exceeded {self.budget_ms:g} ms budget"}
+        except Exception as exc:
+            return {"ok": False, "error": type(exc).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    async def ping(self) -> dict:
+        """Cached ping result; at most one ping per cache window."""
+        if self._ping is not None and time.monotonic() - self._pinged_at < self.cache_seconds:
+            return self._ping
+
+        async with self._lock:
+            # someone else may have refreshed it while we waited
+            if self._ping is None or time.monotonic() - self._pinged_at >= self.cache_seconds:
+                self._ping = await self._run_ping()
+                self._pinged_at = time.monotonic()
+        return self._ping
+
+    def pools(self) -> dict:
+        checked_out = metrics.mongo_pool_checked_out.value()
+        return {
+            "mongo": {
+                "checked_out": checked_out,
+                "max_size": settings.MONGO_MAX_POOL_SIZE,
+                "utilization": round(checked_out / settings.MONGO_MAX_POOL_SIZE, 3),
+            },
+            "password": {
+                "pending": password_pool.pending,
+                "max_pending": password_pool.max_pending,
+                "utilization": round(password_pool.pending / password_pool.max_pending, 3),
+            },
+        }
+
+    async def check(self) -> dict:
+        ping = await self.ping()
+        pools = self.pools()
+        saturated = [
+            name for name, pool in pools.items()
+            if pool["utilization"] >= self.max_pool_utilization
+        ]
+        return {
+            "ready": ping["ok"] and not saturated,
+            "mongo": ping,
+            "pools": pools,
+            "saturated": saturated,
+            "in_flight": metrics.http_in_flight.value(),
+        }
+
+
+readiness = ReadinessProbe(
+    cache_seconds=settings.READINESS_CACHE_SECONDS,
+    budget_ms=settings.READINESS_PING_BUDGET_MS,
+    max_pool_utilization=settings.READINESS_MAX_POOL_UTILIZATION,
+)
@@ -0,0 +1,113 @@
+"""
+Token revocation for AUTH_MODE=claims.
+
+Claims mode trusts the JWT instead of loading the user, so revocation works
+by bumping ``users.token_version``: any token minted with an older version
+is rejected. Only users whose version changed within the token lifetime can
+still hold an unexpired stale token, so that is all the registry mirrors -
+a small set refreshed from Mongo every TOKEN_REVOCATION_REFRESH_SECONDS.
+When it cannot vouch for a token (not loaded yet, overflowed, or stale
+because refreshes keep failing) callers fall back to a database lookup.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.core import database
+from app.core.config import settings
+from app.core.user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVersionRegistry:
+    def __init__(self, max_entries: int, refresh_seconds: int):
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+        self._versions: dict[str, int] = {}
+        self._overflowed = False
+        self._refreshed_at: float | None = None
+
+    @property
+    def complete(self) -> bool:
+        if self._refreshed_at is None or self._overflowed:
+            return False
+        return time.monotonic() - self._refreshed_at < 3 * self.refresh_seconds
+
+    def is_current(self, user_id: str, version: int) -> bool | None:
+        """True/False if the registry can decide, None if the caller must look up."""
+        if not self.complete:
+            return None
+        return version >= self._versions.get(user_id, 0)
+
+    def record(self, user_id: str, version: int):
+        if user_id in self._versions or len(self._versions) < self.max_entries:
+            self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+        else:
+            self._overflowed = True
+
+    async def refresh(self):
+        cutoff = datetime.utcnow() - timedelta(
+            minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+        )
+        docs = await database.get_user_collection().find(
+            {"token_version_changed_at": {"$gte": cutoff}},
+            {"token_version": 1}
+        ).limit(self.max_entries + 1).to_list(None)
+
+        self._overflowed = len(docs) > self.max_entries
+        self._versions = {
+            str(doc["_id"]): doc["token_version"] for doc in docs[:self.max_entries]
+        }
+        self._refreshed_at = time.monotonic()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Token version refresh failed")
+
+
+token_versions = TokenVersionRegistry(
+    max_entries=settings.TOKEN_REVOCATION_MAX_ENTRIES,
+    refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+)
+_refresh_task: asyncio.Task | None = None
+
+
+async def start():
+    global _refresh_task
+    if settings.AUTH_MODE != "claims":
+        return
+    await token_versions.refresh()
+    _refresh_task = asyncio.create_task(token_versions.run())
+
+
+async def stop():
+    global _refresh_task
+    if _refresh_task:
+        _refresh_task.cancel()
+        _refresh_task = None
+
+
+async def revoke_user_tokens(user_id: ObjectId) -> dict | None:
+    """Invalidate every token issued to the user so far."""
+    user = await database.get_user_collection().find_one_and_update(
+        {"_id": user_id},
+        {
+            "$inc": {"token_version": 1},
+            "$set": {"token_version_changed_at": datetime.utcnow()}
+        },
+        projection={"token_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    invalidate_user(user_id=user_id)
+    if user:
+        token_versions.record(str(user_id), user["token_version"])
+    return user
@@ -0,0 +1,159 @@
+"""
+In-process LRU + TTL cache of user documents.
+
+Sits in front of ``database.get_user_collection()`` for the hot read paths
+(authentication, login, share/assignee resolution, owner email joins).
+Entries are keyed by ``_id`` with a secondary email index, expire after
+USER_CACHE_TTL_SECONDS and are evicted least-recently-used beyond
+USER_CACHE_MAX_SIZE. Writers must call ``invalidate_user`` - other workers
+only notice a change once their copy expires, so the TTL bounds staleness.
+"""
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+
+from app.core import database
+from app.core.config import settings
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[ObjectId, tuple[float, dict]] = OrderedDict()
+        self._ids_by_email: dict[str, ObjectId] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: ObjectId) -> dict | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._drop(user_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def get_by_email(self, email: str) -> dict | None:
+        user_id = self._ids_by_email.get(email)
+        if user_id is None:
+            self.misses += 1
+            return None
+        return self.get(user_id)
+
+    def put(self, user: dict):
+        if not self.enabled:
+            return
+        self._drop(user["_id"])
+        self._entries[user["_id"]] = (time.monotonic() + self.ttl_seconds, user)
+        self._ids_by_email[user["email"]] = user["_id"]
+
+        while len(self._entries) > self.max_size:
+            oldest_id = next(iter(self._entries))
+            self._drop(oldest_id)
+            self.evictions += 1
+
+    def invalidate(self, user_id: ObjectId | None = None, email: str | None = None):
+        if email is not None:
+            user_id = self._ids_by_email.get(email, user_id)
+        if user_id is not None:
+            self._drop(user_id)
+
+    def clear(self):
+        self._entries.clear()
+        self._ids_by_email.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _drop(self, user_id: ObjectId):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None and self._ids_by_email.get(entry[1]["email"]) == user_id:
+            del self._ids_by_email[entry[1]["email"]]
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+# Callers get a shallow copy so a handler mutating its user dict can't
+# poison the cache for everyone else.
+
+async def get_user_by_id(user_id: ObjectId) -> dict | None:
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await database.get_user_collection().find_one({"_id": user_id})
+        if user is None:
+            return None
+        user_cache.put(user)
+    return dict(user)
+
+
+async def get_user_by_email(email: str) -> dict | None:
+    user = user_cache.get_by_email(email)
+    if user is None:
+        user = await database.get_user_collection().find_one({"email": email})
+        if user is None:
+            return None
+        user_cache.put(user)
+    return dict(user)
+
+
+async def get_users_by_ids(user_ids: list[ObjectId]) -> dict[ObjectId, dict]:
+    found, missing = {}, []
+    for user_id in dict.fromkeys(user_ids):
+        user = user_cache.get(user_id)
+        if user is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = user
+
+    if missing:
+        async for user in database.get_user_collection().find({"_id": {"$in": missing}}):
+            user_cache.put(user)
+            found[user["_id"]] = user
+
+    return {user_id: dict(user) for user_id, user in found.items()}
+
+
+async def get_users_by_emails(emails: list[str]) -> list[dict]:
+    found, missing = [], []
+    for email in dict.fromkeys(emails):
+        user = user_cache.get_by_email(email)
+        if user is None:
+            missing.append(email)
+        else:
+            found.append(user)
+
+    if missing:
+        async for user in database.get_user_collection().find({"email": {"$in": missing}}):
+            user_cache.put(user)
+            found.append(user)
+
+    return [dict(user) for user in found]
+
+
+def invalidate_user(user_id: ObjectId | None = None, email: str | None = None):
+    user_cache.invalidate(user_id=user_id, email=email)
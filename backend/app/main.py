@@ -1,11 +1,24 @@
 from fastapi import FastAPI
-from app.core import database
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core import database, events, metrics, migrations, rate_limit, revocation
+from app.core.config import settings
+from app.core.readiness import readiness
+from app.core.password_pool import password_pool
+from app.core.user_cache import user_cache
 #from app.core.database import connect_to_mongo, close_mongo_connection, db
 from app.api.v1.auth import router as auth_router
 from app.api.v1.users import router as users_router
 from app.api.v1.tasks import router as tasks_router
 from app.api.v1.notes import router as notes_router
+from app.api.v1.search import router as search_router
+from app.api.v1.events import router as events_router
 from fastapi.middleware.cors import CORSMiddleware
+from app.utils.http_cache import ETAG_HEADER
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.services.sync_service import SYNC_TOKEN_HEADER
+from middleware.query_stats import QueryStatsMiddleware, QUERY_COUNT_HEADER, SERVER_TIMING_HEADER
+from middleware.metrics import MetricsMiddleware
+from middleware.rate_limit import RateLimitMiddleware, RETRY_AFTER_HEADER
 
 
 app = FastAPI(
@@ -13,6 +26,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Innermost of the stack: refusals still get CORS headers and show up in
+# the request metrics, but are decided before routing and authentication
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -24,8 +41,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, SYNC_TOKEN_HEADER, RETRY_AFTER_HEADER, QUERY_COUNT_HEADER, SERVER_TIMING_HEADER],
 )
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Read at scrape time; counters are per worker and summed across workers
+metrics.Gauge("password_pool_pending", "bcrypt jobs queued or running", collect=lambda: password_pool.pending)
+metrics.Counter("password_pool_rejected_total", "bcrypt jobs rejected with 503", collect=lambda: password_pool.rejected)
+metrics.Counter("user_cache_hits_total", "User cache hits", collect=lambda: user_cache.hits)
+metrics.Counter("user_cache_misses_total", "User cache misses", collect=lambda: user_cache.misses)
+metrics.Counter("user_cache_evictions_total", "User cache LRU evictions", collect=lambda: user_cache.evictions)
+metrics.Gauge("user_cache_size", "Users currently cached", collect=lambda: user_cache.stats()["size"])
+metrics.Gauge("events_subscribers", "Open GET /events streams", collect=lambda: events.bus.subscribers)
+metrics.Counter("events_published_total", "Events offered to subscribers, before coalescing", collect=lambda: events.bus.published)
+metrics.Counter("events_overflows_total", "Subscribers disconnected for falling behind", collect=lambda: events.bus.overflows)
+metrics.Gauge("event_loop_lag_ms", "Event loop wake-up delay, decaying", collect=lambda: rate_limit.loop_lag.lag_ms)
+
 
 
 
@@ -35,15 +68,29 @@ app.include_router(users_router, prefix="/api/v1")
 app.include_router(tasks_router, prefix="/api/v1")
 
 app.include_router(notes_router, prefix="/api/v1")
+app.include_router(search_router, prefix="/api/v1")
+app.include_router(events_router, prefix="/api/v1")
 
 @app.on_event("startup")
-def startup_event():
-    database.connect_to_mongo()
+async def startup_event():
+    password_pool.start()
+    await database.connect_to_mongo()
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        await migrations.run_pending()
+    await revocation.start()
+    events.start()
+    rate_limit.start()
+    metrics.start()
 
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
+    metrics.stop()
+    rate_limit.stop()
+    await events.stop()
+    await revocation.stop()
     database.close_mongo_connection()
+    password_pool.stop()
 
 
 @app.get("/health")
@@ -52,4 +99,24 @@ def health_check():
     db_status = "connected" if database.db is not None else "disconnected"
     db_name = getattr(database.db, "name", None) if database.db is not None else None
     return {"status": "ok", "db_status": db_status, "db": db_name}
-     
\ No newline at end of file
+     
+
+@app.get("/livez", include_in_schema=False)
+async def livez():
+    # Liveness: the event loop answers. No I/O - a slow Mongo must not get workers restarted
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    # Readiness: cached Mongo ping within budget and no saturated pool
+    result = await readiness.check()
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(metrics.collect()),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,272 @@
+"""
+Maintenance commands.
+
+    python -m app.manage <command> [options]
+
+Run from ``backend/`` with the same ``.env`` as the API.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core import change_counters, database, migrations
+from app.models.note import compute_readers
+from app.services import note_service, task_services
+
+COMMANDS = {}
+
+
+def command(fn):
+    COMMANDS[fn.__name__.replace("_", "-")] = fn
+    return fn
+
+
+# -------------------------
+# Migrations
+# -------------------------
+
+@command
+async def migrate(args) -> int:
+    """Run pending one-time migrations (index plan, admin seed)."""
+    ran = await migrations.run_pending()
+    for migration_id in ran:
+        print(f"  applied {migration_id}")
+    print(f"{len(ran)} migration(s) applied")
+    return 0
+
+
+# -------------------------
+# Query plans
+# -------------------------
+
+def access_queries():
+    """(label, collection, filter, sort) for every hot access path.
+
+    Built from the same helpers the services use, for a probe user and admin,
+    so an index plan that drifts from the queries shows up here.
+    """
+    user = {"_id": ObjectId(), "role": "user"}
+    admin = {"_id": ObjectId(), "role": "admin"}
+
+    return [
+        ("notes: list visible", "notes",
+         note_service.visible_notes_query(user), note_service.NOTE_LIST_SORT),
+        ("notes: get by id", "notes",
+         {"_id": ObjectId(), **note_service.visible_notes_query(user)}, None),
+        ("tasks: list own", "tasks",
+         task_services.task_list_query(user), task_services.TASK_LIST_SORT),
+        ("tasks: list own by status", "tasks",
+         task_services.task_list_query(user, "pending"), task_services.TASK_LIST_SORT),
+        ("tasks: list all (admin)", "tasks",
+         task_services.task_list_query(admin), task_services.TASK_LIST_SORT),
+        ("tasks: list all by status (admin)", "tasks",
+         task_services.task_list_query(admin, "done"), task_services.TASK_LIST_SORT),
+        ("users: by email", "users", {"email": "probe@example.com"}, None),
+    ]
+
+
+def plan_stages(plan: dict) -> list[str]:
+    """Every stage name in an explain plan tree, depth first."""
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+async def explain(collection: str, query: dict, sort=None, limit: int | None = None) -> dict:
+    cursor = database.db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.explain()
+
+
+@command
+async def check_indexes(args) -> int:
+    """Fail if any access query's winning plan contains a COLLSCAN."""
+    if args.create:
+        await database.ensure_indexes()
+
+    failures = 0
+    for label, collection, query, sort in access_queries():
+        plan = await explain(collection, query, sort)
+        stages = plan_stages(plan["queryPlanner"]["winningPlan"])
+        ok = "COLLSCAN" not in stages
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label:<36} {' <- '.join(stages)}")
+
+    return 1 if failures else 0
+
+
+# -------------------------
+# Note readers (fan-out on write)
+# -------------------------
+
+async def note_reader_drift(batch_size: int = 1000):
+    """Yield (note_id, expected_readers) for every note whose readers are stale."""
+    cursor = database.db["notes"].find(
+        {},
+        {"owner_id": 1, "visibility": 1, "shared_with": 1, "readers": 1}
+    ).batch_size(batch_size)
+
+    async for note in cursor:
+        expected = compute_readers(note["owner_id"], note.get("visibility"), note.get("shared_with"))
+        if sorted(map(str, expected)) != sorted(map(str, note.get("readers") or [])):
+            yield note["_id"], expected
+
+
+@command
+async def rebuild_note_readers(args) -> int:
+    """Recompute the readers array of every note (backfill / repair)."""
+    notes_col = database.db["notes"]
+    batch, fixed = [], 0
+
+    async for note_id, readers in note_reader_drift(args.batch_size):
+        batch.append(UpdateOne({"_id": note_id}, {"$set": {"readers": readers}}))
+        if len(batch) >= args.batch_size:
+            await notes_col.bulk_write(batch, ordered=False)
+            fixed += len(batch)
+            batch = []
+            print(f"  {fixed} notes updated...")
+
+    if batch:
+        await notes_col.bulk_write(batch, ordered=False)
+        fixed += len(batch)
+
+    if fixed:
+        await change_counters.bump(note_service.NOTES_GLOBAL_SCOPE)
+    print(f"Rebuilt readers on {fixed} note(s)")
+    return 0
+
+
+@command
+async def check_note_readers(args) -> int:
+    """Report notes whose readers disagree with owner/visibility/shared_with."""
+    drifted = 0
+    async for note_id, readers in note_reader_drift(args.batch_size):
+        drifted += 1
+        if drifted <= args.show:
+            print(f"  {note_id}: expected readers {[str(r) for r in readers]}")
+
+    print(f"{drifted} note(s) with inconsistent readers")
+    return 1 if drifted else 0
+
+
+# -------------------------
+# Note owner emails (denormalised)
+# -------------------------
+
+async def note_owner_email_drift(batch_size: int = 1000):
+    """Yield (note_id, expected_email) for every note whose owner_email is stale."""
+    cursor = database.db["notes"].find(
+        {},
+        {"owner_id": 1, "owner_email": 1}
+    ).batch_size(batch_size)
+
+    batch = []
+    async for note in cursor:
+        batch.append(note)
+        if len(batch) >= batch_size:
+            async for drift in _owner_email_drift(batch):
+                yield drift
+            batch = []
+    async for drift in _owner_email_drift(batch):
+        yield drift
+
+
+async def _owner_email_drift(notes: list[dict]):
+    owner_ids = list({note["owner_id"] for note in notes})
+    emails = {}
+    if owner_ids:
+        async for user in database.get_user_collection().find({"_id": {"$in": owner_ids}}, {"email": 1}):
+            emails[user["_id"]] = user["email"]
+
+    for note in notes:
+        expected = emails.get(note["owner_id"])
+        if "owner_email" not in note or note["owner_email"] != expected:
+            yield note["_id"], expected
+
+
+@command
+async def rebuild_note_owner_emails(args) -> int:
+    """Copy every owner's current email onto their notes (backfill / repair)."""
+    notes_col = database.db["notes"]
+    batch, fixed = [], 0
+
+    async for note_id, email in note_owner_email_drift(args.batch_size):
+        # updated_at moves too, so delta-sync clients pick up the repaired email
+        batch.append(UpdateOne({"_id": note_id}, {"$set": {"owner_email": email, "updated_at": datetime.utcnow()}}))
+        if len(batch) >= args.batch_size:
+            await notes_col.bulk_write(batch, ordered=False)
+            fixed += len(batch)
+            batch = []
+            print(f"  {fixed} notes updated...")
+
+    if batch:
+        await notes_col.bulk_write(batch, ordered=False)
+        fixed += len(batch)
+
+    if fixed:
+        await change_counters.bump(note_service.NOTES_GLOBAL_SCOPE)
+    print(f"Rebuilt owner_email on {fixed} note(s)")
+    return 0
+
+
+@command
+async def check_note_owner_emails(args) -> int:
+    """Report notes whose owner_email disagrees with the owner's current email."""
+    drifted = 0
+    async for note_id, email in note_owner_email_drift(args.batch_size):
+        drifted += 1
+        if drifted <= args.show:
+            print(f"  {note_id}: expected owner_email {email!r}")
+
+    print(f"{drifted} note(s) with a stale owner_email")
+    return 1 if drifted else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help=migrate.__doc__)
+
+    check = subparsers.add_parser("check-indexes", help=check_indexes.__doc__)
+    check.add_argument("--create", action="store_true", help="create missing indexes first")
+
+    rebuild = subparsers.add_parser("rebuild-note-readers", help=rebuild_note_readers.__doc__)
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+
+    verify = subparsers.add_parser("check-note-readers", help=check_note_readers.__doc__)
+    verify.add_argument("--batch-size", type=int, default=1000)
+    verify.add_argument("--show", type=int, default=20, help="print at most this many offenders")
+
+    rebuild = subparsers.add_parser("rebuild-note-owner-emails", help=rebuild_note_owner_emails.__doc__)
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+
+    verify = subparsers.add_parser("check-note-owner-emails", help=check_note_owner_emails.__doc__)
+    verify.add_argument("--batch-size", type=int, default=1000)
+    verify.add_argument("--show", type=int, default=20, help="print at most this many offenders")
+
+    args = parser.parse_args(argv)
+
+    async def run():
+        database.open_database()
+        try:
+            return await COMMANDS[args.command](args)
+        finally:
+            database.close_mongo_connection()
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
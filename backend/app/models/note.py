@@ -3,6 +3,20 @@ from typing import Optional, List
 from bson import ObjectId
 
 
+# Stands for "every authenticated user" inside a note's readers array
+PUBLIC_READERS = "*"
+
+
+def compute_readers(owner_id: ObjectId, visibility: str, shared_with: Optional[List[ObjectId]]) -> list:
+    """Everyone allowed to read a note, precomputed for fan-out-on-write reads."""
+    readers = [owner_id]
+    if visibility == "public":
+        readers.append(PUBLIC_READERS)
+    elif visibility == "shared":
+        readers.extend(uid for uid in shared_with or [] if uid != owner_id)
+    return readers
+
+
 class NoteModel:
     """
     Internal MongoDB representation of a Note
@@ -15,23 +29,33 @@ class NoteModel:
         owner_id: ObjectId,
         visibility: str = "private",
         shared_with: Optional[List[ObjectId]] = None,
+        owner_email: Optional[str] = None,
         created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None,
         _id: Optional[ObjectId] = None,
     ):
         self.id = _id
         self.title = title
         self.content = content
         self.owner_id = owner_id
+        # Denormalised copy of the owner's email, kept current by
+        # note_service.propagate_owner_email
+        self.owner_email = owner_email
         self.visibility = visibility
         self.shared_with = shared_with or []
+        self.readers = compute_readers(owner_id, visibility, self.shared_with)
         self.created_at = created_at or datetime.utcnow()
+        self.updated_at = updated_at or self.created_at
 
     def to_dict(self):
         return {
             "title": self.title,
             "content": self.content,
             "owner_id": self.owner_id,
+            "owner_email": self.owner_email,
             "visibility": self.visibility,
             "shared_with": self.shared_with,
+            "readers": self.readers,
             "created_at": self.created_at,
+            "updated_at": self.updated_at,
         }
@@ -25,7 +25,8 @@ class TaskModel:
         self.status = status
         self.owner_id = owner_id
         self.created_at = created_at or datetime.utcnow()
-        self.updated_at = updated_at
+        # set on create too, so delta sync sees new tasks
+        self.updated_at = updated_at or self.created_at
         self.updated_by = updated_by
 
     def to_dict(self):
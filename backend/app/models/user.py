@@ -14,6 +14,7 @@ class UserModel:
         email: str,
         password_hash: str,
         role: str = "user",
+        token_version: int = 0,
         created_at: Optional[datetime] = None,
         _id: Optional[ObjectId] = None,
     ):
@@ -21,6 +22,7 @@ class UserModel:
         self.email = email
         self.password_hash = password_hash
         self.role = role
+        self.token_version = token_version
         self.created_at = created_at or datetime.utcnow()
 
     def to_dict(self):
@@ -28,5 +30,6 @@ class UserModel:
             "email": self.email,
             "password_hash": self.password_hash,
             "role": self.role,
+            "token_version": self.token_version,
             "created_at": self.created_at,
         }
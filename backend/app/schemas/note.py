@@ -34,3 +34,11 @@ class NoteResponse(BaseModel):
     owner_email: Optional[str] = None
     visibility: NoteVisibility
     created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
+class NoteDelta(BaseModel):
+    changed: List[NoteResponse]
+    removed: List[str]
+    sync_token: str
+    has_more: bool
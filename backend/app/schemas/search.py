@@ -0,0 +1,32 @@
+from enum import Enum
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.schemas.note import NoteResponse
+from app.schemas.task import TaskResponse
+
+
+class SearchType(str, Enum):
+    all = "all"
+    notes = "notes"
+    tasks = "tasks"
+
+
+class SearchMode(str, Enum):
+    text = "text"       # whole words, ranked by relevance
+    prefix = "prefix"   # start of the title, newest first
+
+
+class NoteSearchHit(NoteResponse):
+    score: Optional[float] = None
+
+
+class TaskSearchHit(TaskResponse):
+    score: Optional[float] = None
+
+
+class SearchResponse(BaseModel):
+    notes: List[NoteSearchHit] = []
+    tasks: List[TaskSearchHit] = []
+    # offset of the next page when either list has more results
+    next_offset: Optional[int] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Dict, List, Literal, Optional, Union
 from datetime import datetime
 from enum import Enum
 
@@ -25,6 +25,22 @@ class TaskUpdate(BaseModel):
         extra = "forbid"
 
 
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    processed: int
+    total: Optional[int] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class TaskStatsResponse(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+
 class TaskResponse(BaseModel):
     id: str
     title: str
@@ -34,3 +50,52 @@ class TaskResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     updated_by: Optional[str] = None
+
+
+class TaskDelta(BaseModel):
+    changed: List[TaskResponse]
+    removed: List[str]
+    sync_token: str
+    has_more: bool
+
+
+# -------------------------
+# Batch operations
+# -------------------------
+
+class TaskBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TaskCreate
+
+
+class TaskBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    data: TaskUpdate
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+
+TaskBatchOperation = Annotated[
+    Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchDelete],
+    Field(discriminator="op")
+]
+
+
+class TaskBatchRequest(BaseModel):
+    operations: List[TaskBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: int
+    detail: Optional[str] = None
+
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskBatchResult]
@@ -21,6 +21,10 @@ class UserLogin(BaseModel):
     password: str
 
 
+class UserEmailUpdate(BaseModel):
+    email: EmailStr
+
+
 class UserResponse(BaseModel):
     id: str
     email: EmailStr
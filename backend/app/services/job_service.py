@@ -0,0 +1,83 @@
+"""
+Background jobs for long-running admin operations.
+
+Job state lives in the ``jobs`` collection rather than in process memory, so
+the status endpoint answers correctly whichever worker the poll lands on.
+The work itself runs as an asyncio task on the worker that accepted the
+request; a job whose worker dies stays "running" until it expires.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+from app.core import database
+
+logger = logging.getLogger(__name__)
+
+# Strong references so running jobs aren't garbage-collected mid-flight
+_running: set[asyncio.Task] = set()
+
+
+async def create_job(kind: str, user, total: int | None = None) -> ObjectId:
+    result = await database.db["jobs"].insert_one({
+        "kind": kind,
+        "status": "pending",
+        "processed": 0,
+        "total": total,
+        "created_by": user["_id"],
+        "created_at": datetime.utcnow(),
+        "finished_at": None,
+        "error": None,
+    })
+    return result.inserted_id
+
+
+async def report_progress(job_id: ObjectId, processed: int):
+    await database.db["jobs"].update_one(
+        {"_id": job_id},
+        {"$set": {"status": "running", "processed": processed}}
+    )
+
+
+def run_in_background(job_id: ObjectId, work):
+    """Run ``work(progress)`` detached and record how it ended on the job."""
+
+    async def runner():
+        jobs_col = database.db["jobs"]
+        try:
+            processed = await work(lambda count: report_progress(job_id, count))
+            await jobs_col.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "done", "processed": processed, "finished_at": datetime.utcnow()}}
+            )
+        except Exception as exc:
+            logger.exception("Job %s failed", job_id)
+            await jobs_col.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "error": str(exc), "finished_at": datetime.utcnow()}}
+            )
+
+    task = asyncio.create_task(runner())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+
+async def get_job(job_id: ObjectId, user):
+    job = await database.db["jobs"].find_one({"_id": job_id})
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    if job["created_by"] != user["_id"] and user["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to view this job"
+        )
+
+    return job
@@ -1,13 +1,42 @@
 from bson import ObjectId
-from fastapi import HTTPException, status
-from app.core import database
-from app.models.note import NoteModel
+from fastapi import HTTPException
+from app.core import change_counters, database
+from app.services import job_service, sync_service
+from app.core.user_cache import get_users_by_emails
+from app.core.config import settings
+from app.models.note import NoteModel, PUBLIC_READERS, compute_readers
+from app.utils import search
+from app.utils.pagination import keyset_filter
+from app.utils.streaming import STREAM_BATCH_SIZE
 from datetime import datetime
 
 
-def _resolve_shared_users(emails: list[str]) -> list[ObjectId]:
+# -------------------------
+# Change counters (ETags)
+# -------------------------
 
-    users = database.db["users"].find({"email": {"$in": emails}})
+# Bumped for changes that can touch anyone's listing (owner email propagation, repairs)
+NOTES_GLOBAL_SCOPE = "notes:global"
+
+
+def note_list_scopes(user) -> list[str]:
+    """Change-counter scopes the visible-notes listing of ``user`` depends on."""
+    return [f"notes:user:{user['_id']}", "notes:public", NOTES_GLOBAL_SCOPE]
+
+
+def _note_scopes(owner_id, visibility, shared_with) -> set[str]:
+    """Scopes of every listing a note with this state appears in."""
+    scopes = {f"notes:user:{owner_id}"}
+    if visibility == "public":
+        scopes.add("notes:public")
+    elif visibility == "shared":
+        scopes.update(f"notes:user:{uid}" for uid in shared_with or [])
+    return scopes
+
+
+async def _resolve_shared_users(emails: list[str]) -> list[ObjectId]:
+
+    users = await get_users_by_emails(emails)
     user_ids = [u["_id"] for u in users]
 
     if len(user_ids) != len(emails):
@@ -19,7 +48,7 @@ def _resolve_shared_users(emails: list[str]) -> list[ObjectId]:
     return user_ids
 
 
-def create_note(data, user):
+async def create_note(data, user):
     shared_ids = []
 
     if data.visibility == "shared":
@@ -28,61 +57,183 @@ def create_note(data, user):
                 status_code=400,
                 detail="Shared notes require shared_with_emails"
             )
-        shared_ids = _resolve_shared_users(data.shared_with_emails)
+        shared_ids = await _resolve_shared_users(data.shared_with_emails)
 
     note = NoteModel(
         title=data.title,
         content=data.content,
         owner_id=user["_id"],
+        owner_email=user.get("email"),
         visibility=data.visibility,
         shared_with=shared_ids
     )
 
-    result = database.db["notes"].insert_one(note.to_dict())
-    return result.inserted_id
+    # BSON dates only keep milliseconds; trim now so the response matches later reads
+    note.created_at = note.updated_at = note.created_at.replace(microsecond=note.created_at.microsecond // 1000 * 1000)
 
+    document = note.to_dict()
+    result = await database.db["notes"].insert_one(document)
+    document["_id"] = result.inserted_id
+    await change_counters.bump(*_note_scopes(note.owner_id, note.visibility, note.shared_with))
+    return document
 
-def get_notes(user):
 
-    query = {
-        "$or": [
-            {"owner_id": user["_id"]},
-            {"visibility": "public"},
-            {
-                "visibility": "shared",
-                "shared_with": user["_id"]
-            }
-        ]
-    }
+# Only the fields NoteResponse needs cross the wire
+NOTE_LIST_PROJECTION = {
+    "title": 1,
+    "content": 1,
+    "owner_id": 1,
+    "visibility": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+NOTE_LIST_SORT = [("created_at", -1), ("_id", -1)]
+
 
-    return list(database.db["notes"].find(query))
+def visible_notes_query(user):
+    """Notes ``user`` may read.
 
+    Each ``$or`` branch has its own index (see ``database.INDEXES["notes"]``),
+    all ending in (created_at, _id), so Mongo answers the sorted listing with
+    one index scan per branch merged in order - never a collection scan.
 
-def get_note_by_id(note_id: ObjectId, user):
+    With NOTES_FANOUT_ON_WRITE the precomputed ``readers`` array replaces the
+    ``$or`` with a single multikey index lookup.
+    """
+    if settings.NOTES_FANOUT_ON_WRITE:
+        return {"readers": {"$in": [user["_id"], PUBLIC_READERS]}}
 
-    note = database.db["notes"].find_one({
-        "_id": note_id,
+    return {
         "$or": [
             {"owner_id": user["_id"]},
             {"visibility": "public"},
-            {
-                "visibility": "shared",
-                "shared_with": user["_id"]
-            }
+            {"shared_with": user["_id"], "visibility": "shared"}
         ]
-    })
+    }
 
-    if not note:
+
+# Joins the owner's email in Mongo; only the email crosses the wire
+OWNER_EMAIL_LOOKUP = [
+    {"$lookup": {
+        "from": "users",
+        "let": {"owner_id": "$owner_id"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$_id", "$$owner_id"]}}},
+            {"$project": {"_id": 0, "email": 1}}
+        ],
+        "as": "owner"
+    }},
+    {"$addFields": {"owner_email": {"$ifNull": [{"$arrayElemAt": ["$owner.email", 0]}, None]}}},
+    {"$project": {"owner": 0}},
+]
+
+
+def note_list_query(user, after: str | None = None):
+    query = visible_notes_query(user)
+    if after:
+        query = {"$and": [query, keyset_filter(after)]}
+    return query
+
+
+def notes_pipeline(match: dict, limit: int | None = None, sort=NOTE_LIST_SORT,
+                   projection=NOTE_LIST_PROJECTION, skip: int = 0) -> list[dict]:
+    """$match -> $sort -> $limit -> $lookup: the join only runs for the page served."""
+    pipeline = [
+        {"$match": match},
+        {"$sort": dict(sort)},
+    ]
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": projection})
+    return pipeline + OWNER_EMAIL_LOOKUP
+
+
+def _find_notes(match: dict, limit: int | None = None, sort=NOTE_LIST_SORT,
+                projection=NOTE_LIST_PROJECTION, skip: int = 0):
+    source = settings.NOTES_OWNER_EMAIL_SOURCE
+    if source == "lookup":
+        return database.db["notes"].aggregate(notes_pipeline(match, limit, sort, projection, skip))
+
+    if source == "denormalized":
+        # Notes not yet backfilled simply lack the field and fall back to the cache
+        projection = {**projection, "owner_email": 1}
+
+    cursor = database.db["notes"].find(match, projection).sort(sort)
+    if skip:
+        cursor = cursor.skip(skip)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+
+async def get_notes(user, limit: int | None = None, after: str | None = None):
+    """Notes visible to ``user``, newest first.
+
+    With a ``limit`` returns up to ``limit + 1`` rows (see
+    ``app.utils.pagination.next_cursor``). In "lookup" and "denormalized"
+    mode notes already carry ``owner_email``.
+    """
+    return await _find_notes(
+        note_list_query(user, after),
+        limit + 1 if limit else None
+    ).to_list(None)
+
+
+def iter_notes(user, limit: int | None = None, after: str | None = None,
+               batch_size: int = STREAM_BATCH_SIZE):
+    """Same listing as ``get_notes`` as an async cursor, fetched batch by batch."""
+    return _find_notes(note_list_query(user, after), limit).batch_size(batch_size)
+
+
+async def get_note_changes(user, since: str, limit: int) -> dict:
+    """Notes changed and removed for ``user`` since the sync token ``since``.
+
+    ``removed`` also lists notes the user could see before and no longer can.
+    """
+    issued = sync_service.issue_token()
+    changed = await _find_notes(
+        {"$and": [visible_notes_query(user), sync_service.since_filter(since)]},
+        limit + 1,
+        sync_service.SYNC_SORT
+    ).to_list(None)
+    token, has_more = sync_service.next_token(changed, limit, since, issued)
+    removed = await sync_service.removed_since("note", sync_service.note_audience(user), since, changed)
+    return {"changed": changed, "removed": removed, "sync_token": token, "has_more": has_more}
+
+
+async def search_notes(user, q: str, mode: str = "text", limit: int = 20, offset: int = 0):
+    """Notes visible to ``user`` matching ``q``, best match first.
+
+    Same visibility rules as ``get_notes``. "text" mode ranks by text score
+    and adds it to each note as ``score``; "prefix" mode matches the start of
+    the title and keeps the listing order. Returns up to ``limit + 1`` rows.
+    """
+    if mode == "prefix":
+        match = {"$and": [visible_notes_query(user), search.prefix_filter("title", q)]}
+        sort, projection = NOTE_LIST_SORT, NOTE_LIST_PROJECTION
+    else:
+        match = {**search.text_filter(q), **visible_notes_query(user)}
+        sort, projection = search.TEXT_SORT, {**NOTE_LIST_PROJECTION, "score": search.TEXT_SCORE}
+
+    return await _find_notes(match, limit + 1, sort, projection, offset).to_list(None)
+
+
+async def _raise_write_denied(note_id: ObjectId, detail: str):
+    """Failure path of a conditional write: tell "missing" from "not yours"."""
+    if not await database.db["notes"].find_one({"_id": note_id}, {"_id": 1}):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found or access denied"
+            status_code=404,
+            detail="Note not found"
         )
-
-    return note
-
+    raise HTTPException(
+        status_code=403,
+        detail=detail
+    )
 
 
-def update_note(note_id: ObjectId, data, user):
+async def update_note(note_id: ObjectId, data, user):
 
     # note = database.db["notes"].find_one({
     #     "_id": note_id,
@@ -98,24 +249,11 @@ def update_note(note_id: ObjectId, data, user):
     # Issue above is that it doesnot check if note_id is valid so if owner is right one but note_id s wrong 
     # Then also it will say owner is not right  
 
-    notes_col = database.db["notes"]
-
-    # 1️⃣ Check existence first
-    note = notes_col.find_one({"_id": note_id})
-
-    if not note:
-        raise HTTPException(
-            status_code=404,
-            detail="Note not found"
-        )
-
-    # 2️⃣ Check ownership
-    if note["owner_id"] != user["_id"]:
-        raise HTTPException(
-            status_code=403,
-            detail="Only owner can update note"
-        )
+    # Fixed below: the owner predicate is folded into the write itself and
+    # only a failed write pays for a second query to tell 404 from 403.
 
+    notes_col = database.db["notes"]
+    note_filter = {"_id": note_id, "owner_id": user["_id"]}
 
     # Issue Below is that if we update just one field and leave other untoched then defalut values where updated into thatone field
     # update_data = {}
@@ -140,47 +278,110 @@ def update_note(note_id: ObjectId, data, user):
     update_data = data.dict(exclude_unset=True) # This Line Means Only update when explicitly provided 
     
     if not update_data:
-        return  # nothing to update
-    
+        # nothing to update, but still report 404/403 like a real write would
+        if not await notes_col.find_one(note_filter, {"_id": 1}):
+            await _raise_write_denied(note_id, "Only owner can update note")
+        return
+
     if "visibility" in update_data and update_data["visibility"] == "shared":
+        # 404/403 come before any 400, and before resolving emails costs a users query
+        if not await notes_col.find_one(note_filter, {"_id": 1}):
+            await _raise_write_denied(note_id, "Only owner can update note")
         if not data.shared_with_emails:
             raise HTTPException(
                 status_code=400,
                 detail="Shared notes require shared_with_emails"
             )
-        update_data["shared_with"] = _resolve_shared_users(
+        update_data["shared_with"] = await _resolve_shared_users(
             data.shared_with_emails
         )
         update_data.pop("shared_with_emails", None)
 
+    # Only the owner gets here, so the new readers follow from the update alone
+    if "visibility" in update_data:
+        update_data["readers"] = compute_readers(
+            user["_id"],
+            update_data["visibility"],
+            update_data.get("shared_with")
+        )
+
     update_data["updated_at"] = datetime.utcnow()
     update_data["updated_by"] = user["_id"]
 
-
-    notes_col.update_one(
-        {"_id": note_id},
-        {"$set": update_data}
+    # 1️⃣ Existence + ownership + update in one atomic round trip
+    note = await notes_col.find_one_and_update(
+        note_filter,
+        {"$set": update_data},
+        projection={"owner_id": 1, "visibility": 1, "shared_with": 1}
     )
 
+    # 2️⃣ Only on failure: a second, cheap query decides between 404 and 403
+    if note is None:
+        await _raise_write_denied(note_id, "Only owner can update note")
+
+    if "visibility" in update_data:
+        # readers who lost access drop the note on their next delta sync
+        before = compute_readers(note["owner_id"], note.get("visibility"), note.get("shared_with"))
+        lost = [reader for reader in before if reader not in update_data["readers"]]
+        if lost:
+            await sync_service.record_tombstones("note", [
+                {"doc_id": note_id, "readers": [PUBLIC_READERS] if PUBLIC_READERS in lost else lost}
+            ])
+
+    # Listings that showed the note before or show it now
+    await change_counters.bump(
+        *_note_scopes(note["owner_id"], note.get("visibility"), note.get("shared_with")),
+        *_note_scopes(
+            note["owner_id"],
+            update_data.get("visibility", note.get("visibility")),
+            update_data.get("shared_with", note.get("shared_with"))
+        )
+    )
+    return note
 
 
-def delete_note(note_id: ObjectId, user):
+async def delete_note(note_id: ObjectId, user):
     notes_col = database.db["notes"]
 
-    # 1️⃣ Check existence
-    note = notes_col.find_one({"_id": note_id})
-    if not note:
-        raise HTTPException(
-            status_code=404,
-            detail="Note not found"
-        )
+    # 1️⃣ Existence + ownership + delete in one atomic round trip
+    note = await notes_col.find_one_and_delete(
+        {"_id": note_id, "owner_id": user["_id"]},
+        projection={"owner_id": 1, "visibility": 1, "shared_with": 1}
+    )
 
-    # 2️⃣ Check ownership
-    if note["owner_id"] != user["_id"]:
-        raise HTTPException(
-            status_code=403,
-            detail="Only owner can delete note"
-        )
+    # 2️⃣ Only on failure: a second, cheap query decides between 404 and 403
+    if note is None:
+        await _raise_write_denied(note_id, "Only owner can delete note")
+
+    await sync_service.record_tombstones("note", [{
+        "doc_id": note_id,
+        "readers": compute_readers(note["owner_id"], note.get("visibility"), note.get("shared_with"))
+    }])
+    await change_counters.bump(*_note_scopes(note["owner_id"], note.get("visibility"), note.get("shared_with")))
+    return note
+
+
+# -------------------------
+# Denormalised owner email
+# -------------------------
+
+async def propagate_owner_email(user_id: ObjectId, email: str) -> int:
+    """Rewrite the stored owner_email on every note of ``user_id``."""
+    result = await database.db["notes"].update_many(
+        {"owner_id": user_id, "owner_email": {"$ne": email}},
+        {"$set": {"owner_email": email, "updated_at": datetime.utcnow()}}
+    )
+    await change_counters.bump(NOTES_GLOBAL_SCOPE)
+    return result.modified_count
+
+
+async def start_owner_email_propagation(user_id: ObjectId, email: str, current_user) -> ObjectId:
+    """Run ``propagate_owner_email`` as a background job and return its id."""
+    total = await database.db["notes"].count_documents({"owner_id": user_id})
+    job_id = await job_service.create_job("propagate_owner_email", current_user, total)
+
+    async def work(progress):
+        return await propagate_owner_email(user_id, email)
 
-    # 3️⃣ Delete
-    notes_col.delete_one({"_id": note_id})
+    job_service.run_in_background(job_id, work)
+    return job_id
@@ -0,0 +1,99 @@
+"""
+Delta sync: ``GET /tasks?since=<token>`` and ``GET /notes?since=<token>``.
+
+A sync token is a keyset position in (updated_at, _id) order, the same
+opaque format as the pagination cursors. Every write path stamps
+``updated_at`` (creates included), so "changed since" is one index range
+scan; deletes - and notes a reader has lost access to - leave a tombstone in
+``tombstones`` carrying who could see the document.
+
+Clients treat ``changed`` as upserts and ``removed`` as deletes, so seeing
+an item twice is harmless. Tokens handed out at the end of a sync therefore
+lie SYNC_OVERLAP_SECONDS in the past: a write whose ``updated_at`` was taken
+just before a sync but committed just after it is still picked up next time.
+Tombstones expire after SYNC_TOMBSTONE_TTL_DAYS; an older token gets 410 and
+the client falls back to a full listing.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+from app.core import database
+from app.core.config import settings
+from app.models.note import PUBLIC_READERS
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter, next_cursor
+
+logger = logging.getLogger(__name__)
+
+SYNC_TOKEN_HEADER = "X-Sync-Token"
+SYNC_SORT = [("updated_at", 1), ("_id", 1)]
+# Lowest possible _id: a token at (t, MIN_ID) covers everything updated at t
+MIN_ID = ObjectId("0" * 24)
+
+
+def issue_token() -> str:
+    """Token for "everything from now on", taken before the listing is read."""
+    at = datetime.utcnow() - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    return encode_cursor(at.replace(microsecond=at.microsecond // 1000 * 1000), MIN_ID)
+
+
+def since_filter(since: str) -> dict:
+    """Documents updated after ``since``; 410 once its tombstones may be gone."""
+    updated_at, _ = decode_cursor(since)
+    if updated_at < datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired; fetch the full listing and sync from its token"
+        )
+    return keyset_filter(since, field="updated_at", descending=False)
+
+
+def next_token(rows: list[dict], limit: int, since: str, issued: str) -> tuple[str, bool]:
+    """(token for the next call, whether more changes are waiting).
+
+    Trims ``rows`` to ``limit`` like ``next_cursor``. After the last page the
+    token moves to ``issued`` - never backwards past ``since``.
+    """
+    cursor = next_cursor(rows, limit, field="updated_at")
+    if cursor:
+        return cursor, True
+    return max(since, issued, key=decode_cursor), False
+
+
+async def removed_since(kind: str, audience: dict, since: str, changed: list[dict]) -> list[str]:
+    """Ids tombstoned after ``since`` for this audience, minus any still visible in ``changed``."""
+    deleted_after, _ = decode_cursor(since)
+    still_visible = {row["_id"] for row in changed}
+    ids = []
+    async for tombstone in database.db["tombstones"].find(
+        {"kind": kind, "deleted_at": {"$gte": deleted_after}, **audience},
+        {"doc_id": 1}
+    ):
+        if tombstone["doc_id"] not in still_visible:
+            ids.append(str(tombstone["doc_id"]))
+    return list(dict.fromkeys(ids))
+
+
+def task_audience(user) -> dict:
+    return {} if user["role"] == "admin" else {"owner_id": user["_id"]}
+
+
+def note_audience(user) -> dict:
+    return {"readers": {"$in": [user["_id"], PUBLIC_READERS]}}
+
+
+async def record_tombstones(kind: str, tombstones: list[dict]):
+    """Store ``{"doc_id", "owner_id" | "readers"}`` entries for removed documents."""
+    if not tombstones:
+        return
+    now = datetime.utcnow()
+    try:
+        await database.db["tombstones"].insert_many(
+            [{"kind": kind, "deleted_at": now, **tombstone} for tombstone in tombstones],
+            ordered=False
+        )
+    except Exception:
+        # the delete itself succeeded; synced clients keep the document until a full resync
+        logger.exception("Recording %d %s tombstone(s) failed", len(tombstones), kind)
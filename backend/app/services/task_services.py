@@ -1,13 +1,79 @@
 from bson import ObjectId
 from bson.errors import InvalidId
 from fastapi import HTTPException, status
-from app.core import database
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core import change_counters, database
+from app.core.config import settings
+from app.services import job_service, sync_service
+from app.core.user_cache import get_user_by_email, get_user_by_id, get_users_by_emails, get_users_by_ids
 from app.models.task import TaskModel
+from app.schemas.task import TaskStatus
+from app.utils import search
+from app.utils.pagination import keyset_filter
+from app.utils.streaming import STREAM_BATCH_SIZE
+import time
+from collections import OrderedDict
 from datetime import datetime
 
-def create_task(data, current_user):
+# Only the fields TaskResponse needs cross the wire
+TASK_LIST_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "status": 1,
+    "owner_id": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "updated_by": 1,
+}
+# Newest first; _id breaks created_at ties so keyset pages never overlap
+TASK_LIST_SORT = [("created_at", -1), ("_id", -1)]
+
+# -------------------------
+# Change counters (ETags)
+# -------------------------
+
+def task_list_scopes(user) -> list[str]:
+    """Change-counter scopes a task listing of ``user`` depends on."""
+    if user["role"] == "admin":
+        return ["tasks:all"]
+    return [f"tasks:user:{user['_id']}", "tasks:fanout"]
+
+
+async def _tasks_changed(*owner_ids):
+    await change_counters.bump("tasks:all", *(f"tasks:user:{owner_id}" for owner_id in owner_ids))
+
+
+async def _resolve_assignee(assignee_id: str):
+    # Check if assignee_id is an email or ObjectId
+    # If it contains "@", treat it as an email, otherwise as ObjectId
+    if "@" in assignee_id:
+        # Look up user by email
+        user = await get_user_by_email(assignee_id)
+        if not user:
+            raise HTTPException(
+                status_code=404,
+                detail=f"User with email '{assignee_id}' not found"
+            )
+    else:
+        # Try to look up by ObjectId
+        try:
+            user = await get_user_by_id(ObjectId(assignee_id))
+            if not user:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"User with ID '{assignee_id}' not found"
+                )
+        except (InvalidId, ValueError, TypeError):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid assignee ID format: '{assignee_id}'. Please provide either an email or a valid ObjectId"
+            )
+    return user
+
+
+async def create_task(data, current_user):
     tasks_col = database.db["tasks"]
-    users_col = database.db["users"]
 
     tasks_to_create = []
 
@@ -25,30 +91,7 @@ def create_task(data, current_user):
     else:
         # Assign to specific user
         if data.assignee_id:
-            # Check if assignee_id is an email or ObjectId
-            # If it contains "@", treat it as an email, otherwise as ObjectId
-            if "@" in data.assignee_id:
-                # Look up user by email
-                user = users_col.find_one({"email": data.assignee_id})
-                if not user:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"User with email '{data.assignee_id}' not found"
-                    )
-            else:
-                # Try to look up by ObjectId
-                try:
-                    user = users_col.find_one({"_id": ObjectId(data.assignee_id)})
-                    if not user:
-                        raise HTTPException(
-                            status_code=404,
-                            detail=f"User with ID '{data.assignee_id}' not found"
-                        )
-                except (InvalidId, ValueError, TypeError):
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Invalid assignee ID format: '{data.assignee_id}'. Please provide either an email or a valid ObjectId"
-                    )
+            user = await _resolve_assignee(data.assignee_id)
 
             tasks_to_create.append(
                 TaskModel(
@@ -61,24 +104,68 @@ def create_task(data, current_user):
 
         # Assign to all users
         else:
-            all_users = users_col.find({"role": "user"})
-            for user in all_users:
-                tasks_to_create.append(
-                    TaskModel(
-                        title=data.title,
-                        description=data.description,
-                        status=data.status,
-                        owner_id=user["_id"]
-                    )
-                )
+            return await assign_to_all_users(data)
 
     # Bulk insert
     if tasks_to_create:
-        tasks_col.insert_many([t.to_dict() for t in tasks_to_create])
+        await tasks_col.insert_many([t.to_dict() for t in tasks_to_create])
+        await _tasks_changed(*(t.owner_id for t in tasks_to_create))
 
     return len(tasks_to_create)
 
-def get_tasks(user, status: str | None = None):
+async def assign_to_all_users(data, progress=None) -> int:
+    """Create one task per regular user without materialising the user base.
+
+    Streams ``_id``-only user documents (covered by the users role index) and
+    inserts in fixed-size unordered batches. ``progress(created)`` is awaited
+    after each batch.
+    """
+    tasks_col = database.db["tasks"]
+    batch_size = settings.TASK_FANOUT_BATCH_SIZE
+
+    users = database.db["users"].find(
+        {"role": "user"},
+        {"_id": 1}
+    ).batch_size(batch_size)
+
+    created, batch = 0, []
+    async for user in users:
+        batch.append(
+            TaskModel(
+                title=data.title,
+                description=data.description,
+                status=data.status,
+                owner_id=user["_id"]
+            ).to_dict()
+        )
+        if len(batch) >= batch_size:
+            await tasks_col.insert_many(batch, ordered=False)
+            await change_counters.bump("tasks:all", "tasks:fanout")
+            created += len(batch)
+            batch = []
+            if progress:
+                await progress(created)
+
+    if batch:
+        await tasks_col.insert_many(batch, ordered=False)
+        created += len(batch)
+
+    # every user's listing may have changed
+    await change_counters.bump("tasks:all", "tasks:fanout")
+    return created
+
+
+async def start_assign_to_all_users(data, current_user) -> ObjectId:
+    """Queue ``assign_to_all_users`` as a background job and return its id."""
+    total = await database.db["users"].count_documents({"role": "user"})
+    job_id = await job_service.create_job("assign_to_all_users", current_user, total)
+    job_service.run_in_background(
+        job_id, lambda progress: assign_to_all_users(data, progress)
+    )
+    return job_id
+
+
+def task_list_query(user, status: str | None = None, after: str | None = None):
     query = {}
 
     if user["role"] != "admin":
@@ -87,11 +174,126 @@ def get_tasks(user, status: str | None = None):
     if status:
         query["status"] = status
 
-    return list(database.db["tasks"].find(query))
+    if after:
+        query.update(keyset_filter(after))
+
+    return query
+
+
+async def get_tasks(user, status: str | None = None, limit: int | None = None, after: str | None = None):
+    """Tasks visible to ``user``, newest first.
+
+    Returns up to ``limit + 1`` rows so the caller can tell whether another
+    page exists (see ``app.utils.pagination.next_cursor``).
+    """
+    cursor = database.db["tasks"].find(
+        task_list_query(user, status, after),
+        TASK_LIST_PROJECTION
+    ).sort(TASK_LIST_SORT)
+
+    if limit:
+        cursor = cursor.limit(limit + 1)
+
+    return await cursor.to_list(None)
+
+
+def iter_tasks(user, status: str | None = None, limit: int | None = None,
+               after: str | None = None, batch_size: int = STREAM_BATCH_SIZE):
+    """Same listing as ``get_tasks`` as an async cursor, fetched batch by batch."""
+    cursor = database.db["tasks"].find(
+        task_list_query(user, status, after),
+        TASK_LIST_PROJECTION
+    ).sort(TASK_LIST_SORT).batch_size(batch_size)
+
+    if limit:
+        cursor = cursor.limit(limit)
+
+    return cursor
+
+
+async def get_task_changes(user, since: str, limit: int) -> dict:
+    """Tasks changed and removed for ``user`` since the sync token ``since``."""
+    issued = sync_service.issue_token()
+    changed = await database.db["tasks"].find(
+        {**task_list_query(user), **sync_service.since_filter(since)},
+        TASK_LIST_PROJECTION
+    ).sort(sync_service.SYNC_SORT).limit(limit + 1).to_list(None)
+    token, has_more = sync_service.next_token(changed, limit, since, issued)
+    removed = await sync_service.removed_since("task", sync_service.task_audience(user), since, changed)
+    return {"changed": changed, "removed": removed, "sync_token": token, "has_more": has_more}
+
+
+async def search_tasks(user, q: str, mode: str = "text", status: str | None = None,
+                       limit: int = 20, offset: int = 0):
+    """Tasks visible to ``user`` matching ``q``, best match first.
+
+    Same ownership rules as ``get_tasks``; see ``note_service.search_notes``
+    for the two modes. Returns up to ``limit + 1`` rows.
+    """
+    query = task_list_query(user, status)
+    if mode == "prefix":
+        query.update(search.prefix_filter("title", q))
+        sort, projection = TASK_LIST_SORT, TASK_LIST_PROJECTION
+    else:
+        query.update(search.text_filter(q))
+        sort, projection = search.TEXT_SORT, {**TASK_LIST_PROJECTION, "score": search.TEXT_SCORE}
+
+    cursor = database.db["tasks"].find(query, projection).sort(sort)
+    if offset:
+        cursor = cursor.skip(offset)
+    return await cursor.limit(limit + 1).to_list(None)
+
+
+# -------------------------
+# Status counts (GET /tasks/stats)
+# -------------------------
+
+# user id (or "all" for admins) -> (version, expires_at, stats)
+_stats_cache: OrderedDict[str, tuple[str, float, dict]] = OrderedDict()
+
+
+def _stats_key(user) -> str:
+    return "all" if user["role"] == "admin" else str(user["_id"])
+
+
+async def count_tasks_by_status(user) -> dict:
+    """One ``$group`` over the tasks ``user`` can see (the owner_id/status index covers it)."""
+    counts = {task_status.value: 0 for task_status in TaskStatus}
+    rows = await database.db["tasks"].aggregate([
+        {"$match": task_list_query(user)},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+    ]).to_list(None)
+    for row in rows:
+        counts[row["_id"]] = row["count"]
+    return {"total": sum(counts.values()), "by_status": counts}
+
+
+async def get_task_stats(user) -> tuple[str, dict]:
+    """(version, per-status counts) of the tasks ``user`` can see.
+
+    The version is the ETag of the user's task change counters, which every
+    write path already bumps; while it is unchanged the counts come from
+    this worker's cache, so a dashboard poll costs one ``change_counters``
+    lookup however many tasks there are.
+    """
+    version = await change_counters.etag(task_list_scopes(user), "tasks/stats")
+    key = _stats_key(user)
+
+    cached = _stats_cache.get(key)
+    if cached and cached[0] == version and cached[1] > time.monotonic():
+        _stats_cache.move_to_end(key)
+        return version, cached[2]
+
+    stats = await count_tasks_by_status(user)
+    _stats_cache[key] = (version, time.monotonic() + settings.TASK_STATS_CACHE_SECONDS, stats)
+    _stats_cache.move_to_end(key)
+    while len(_stats_cache) > settings.TASK_STATS_CACHE_MAX_ENTRIES:
+        _stats_cache.popitem(last=False)
+    return version, stats
 
 
-def get_task_by_id(task_id: ObjectId):
-    task = database.db["tasks"].find_one({"_id": task_id})
+async def get_task_by_id(task_id: ObjectId):
+    task = await database.db["tasks"].find_one({"_id": task_id})
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,64 +302,282 @@ def get_task_by_id(task_id: ObjectId):
     return task
 
 
-def update_task(task_id: ObjectId, data, user):
-    tasks_col = database.db["tasks"]
+def _ownership_filter(user) -> dict:
+    """Extra write predicate: admins may touch any task, users only their own."""
+    return {} if user["role"] == "admin" else {"owner_id": user["_id"]}
 
-    # 1️⃣ Existence check
-    task = tasks_col.find_one({"_id": task_id})
-    if not task:
+
+async def _raise_write_denied(task_id: ObjectId, detail: str):
+    """Failure path of a conditional write: tell "missing" from "not yours"."""
+    if not await database.db["tasks"].find_one({"_id": task_id}, {"_id": 1}):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=detail
+    )
 
-    # 2️⃣ Authorization
-    is_owner = task["owner_id"] == user["_id"]
-    is_admin = user["role"] == "admin"
 
-    if not (is_owner or is_admin):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not allowed to update this task"
-        )
+async def update_task(task_id: ObjectId, data, user):
+    tasks_col = database.db["tasks"]
 
-    # 3️⃣ Prepare update payload
+    # 1️⃣ Prepare update payload
     # update_data = {
     #     **{k: v for k, v in data.dict().items() if v is not None},
     #     "updated_at": datetime.utcnow(),
     #     "updated_by": user["_id"]
     # }
     update_data = data.dict(exclude_unset=True)
+    task_filter = {"_id": task_id, **_ownership_filter(user)}
 
     if not update_data:
-        return  # nothing to update
+        # nothing to update, but still report 404/403 like a real write would
+        if not await tasks_col.find_one(task_filter, {"_id": 1}):
+            await _raise_write_denied(task_id, "Not allowed to update this task")
+        return
 
     update_data["updated_at"] = datetime.utcnow()
     update_data["updated_by"] = user["_id"]
 
-    # 4️⃣ Apply update
-    tasks_col.update_one(
-        {"_id": task_id},
-        {"$set": update_data}
+    # 2️⃣ Existence + authorization + update in one atomic round trip
+    task = await tasks_col.find_one_and_update(
+        task_filter,
+        {"$set": update_data},
+        projection={"owner_id": 1, "status": 1}
     )
 
-def delete_task(task_id: ObjectId, user):
+    # 3️⃣ Only on failure: a second, cheap query decides between 404 and 403
+    if task is None:
+        await _raise_write_denied(task_id, "Not allowed to update this task")
+
+    await _tasks_changed(task["owner_id"])
+    return task
+
+async def delete_task(task_id: ObjectId, user):
     tasks_col = database.db["tasks"]
 
-    # 1️⃣ Existence check
-    task = tasks_col.find_one({"_id": task_id})
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
+    # 1️⃣ Existence + authorization + delete in one atomic round trip
+    task = await tasks_col.find_one_and_delete(
+        {"_id": task_id, **_ownership_filter(user)},
+        projection={"owner_id": 1, "status": 1}
+    )
 
-    # 2️⃣ Authorization
-    if task["owner_id"] != user["_id"] and user["role"] != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not allowed to delete this task"
+    # 2️⃣ Only on failure: a second, cheap query decides between 404 and 403
+    if task is None:
+        await _raise_write_denied(task_id, "Not allowed to delete this task")
+
+    await sync_service.record_tombstones("task", [{"doc_id": task_id, "owner_id": task["owner_id"]}])
+    await _tasks_changed(task["owner_id"])
+    return task
+
+async def _resolve_assignees(assignee_ids: list[str]) -> dict:
+    """``_resolve_assignee`` for many references at once: ref -> user or HTTPException.
+
+    Emails and ObjectIds are each looked up with one ``$in`` query (cache
+    misses only).
+    """
+    resolved, emails, object_ids = {}, [], {}
+    for assignee_id in dict.fromkeys(assignee_ids):
+        if "@" in assignee_id:
+            emails.append(assignee_id)
+            continue
+        try:
+            object_ids[assignee_id] = ObjectId(assignee_id)
+        except (InvalidId, ValueError, TypeError):
+            resolved[assignee_id] = HTTPException(
+                status_code=400,
+                detail=f"Invalid assignee ID format: '{assignee_id}'. Please provide either an email or a valid ObjectId"
+            )
+
+    by_email = {user["email"]: user for user in await get_users_by_emails(emails)} if emails else {}
+    by_id = await get_users_by_ids(list(object_ids.values())) if object_ids else {}
+
+    for email in emails:
+        resolved[email] = by_email.get(email) or HTTPException(
+            status_code=404,
+            detail=f"User with email '{email}' not found"
+        )
+    for assignee_id, object_id in object_ids.items():
+        resolved[assignee_id] = by_id.get(object_id) or HTTPException(
+            status_code=404,
+            detail=f"User with ID '{assignee_id}' not found"
         )
+    return resolved
+
+
+async def apply_task_batch(operations, user) -> list[dict]:
+    """Apply mixed create/update/delete operations with one bulk_write.
+
+    Ownership is checked for every referenced task with a single ``$in``
+    query, and the owner predicate is repeated in each write filter so a
+    concurrent change cannot slip past the check. The bulk result's
+    matched/deleted counts confirm the writes; only when they fall short
+    (a task deleted or reassigned in between) is a second ``$in`` query
+    made to find the writes that missed. Returns one result per
+    operation, in request order.
+    """
+    tasks_col = database.db["tasks"]
+    results = [None] * len(operations)
+
+    def fail(index, op, status_code, detail, task_id=None):
+        results[index] = {"index": index, "op": op.op, "id": task_id, "status": status_code, "detail": detail}
+
+    # 1️⃣ Parse ids; a task may appear only once so unordered writes can't race each other
+    target_ids, seen = {}, set()
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            continue
+        try:
+            task_id = ObjectId(op.id)
+        except (InvalidId, ValueError, TypeError):
+            fail(index, op, status.HTTP_400_BAD_REQUEST, f"Invalid task ID format: {op.id}", op.id)
+            continue
+        if task_id in seen:
+            fail(index, op, status.HTTP_400_BAD_REQUEST, "Task appears more than once in the batch", op.id)
+            continue
+        seen.add(task_id)
+        target_ids[index] = task_id
+
+    # 2️⃣ One query for existence + ownership of every referenced task
+    owners = {}
+    if target_ids:
+        async for task in tasks_col.find({"_id": {"$in": list(target_ids.values())}}, {"owner_id": 1}):
+            owners[task["_id"]] = task["owner_id"]
+
+    is_admin = user["role"] == "admin"
+    owner_filter = _ownership_filter(user)
+    assignees = {}
+    if is_admin:
+        assignees = await _resolve_assignees([
+            op.data.assignee_id for op in operations if op.op == "create" and op.data.assignee_id
+        ])
+    requests, request_indexes = [], []
+    created_owners = {}  # index -> owner_id of each create
+
+    # 3️⃣ Build the write for every operation that passed its checks
+    for index, op in enumerate(operations):
+        if results[index] is not None:
+            continue
+
+        if op.op == "create":
+            if is_admin and not op.data.assignee_id:
+                fail(index, op, status.HTTP_400_BAD_REQUEST, "Batch create requires assignee_id for admins")
+                continue
+            owner = assignees[op.data.assignee_id] if is_admin else user
+            if isinstance(owner, HTTPException):
+                fail(index, op, owner.status_code, owner.detail)
+                continue
+
+            document = TaskModel(
+                title=op.data.title,
+                description=op.data.description,
+                status=op.data.status,
+                owner_id=owner["_id"]
+            ).to_dict()
+            document["_id"] = ObjectId()  # assigned up front so the result can report it
+            requests.append(InsertOne(document))
+            created_owners[index] = owner["_id"]
+            results[index] = {"index": index, "op": op.op, "id": str(document["_id"]), "status": status.HTTP_201_CREATED}
+            request_indexes.append(index)
+            continue
+
+        task_id = target_ids[index]
+        if task_id not in owners:
+            fail(index, op, status.HTTP_404_NOT_FOUND, "Task not found", op.id)
+            continue
+        if owners[task_id] != user["_id"] and not is_admin:
+            fail(index, op, status.HTTP_403_FORBIDDEN, f"Not allowed to {op.op} this task", op.id)
+            continue
+
+        if op.op == "update":
+            update_data = op.data.dict(exclude_unset=True)
+            results[index] = {"index": index, "op": op.op, "id": op.id, "status": status.HTTP_200_OK}
+            if not update_data:
+                continue  # nothing to update
+            update_data["updated_at"] = datetime.utcnow()
+            update_data["updated_by"] = user["_id"]
+            requests.append(UpdateOne({"_id": task_id, **owner_filter}, {"$set": update_data}))
+        else:
+            results[index] = {"index": index, "op": op.op, "id": op.id, "status": status.HTTP_204_NO_CONTENT}
+            requests.append(DeleteOne({"_id": task_id, **owner_filter}))
+        request_indexes.append(index)
+
+    if not requests:
+        return results
+
+    # 4️⃣ One round trip for all writes
+    try:
+        outcome = await tasks_col.bulk_write(requests, ordered=False)
+        matched, deleted = outcome.matched_count, outcome.deleted_count
+    except BulkWriteError as exc:
+        for error in exc.details.get("writeErrors", []):
+            index = request_indexes[error["index"]]
+            results[index]["status"] = status.HTTP_409_CONFLICT
+            results[index]["detail"] = error.get("errmsg")
+        matched, deleted = exc.details.get("nMatched", 0), exc.details.get("nRemoved", 0)
+
+    # 5️⃣ Confirm the owner-filtered writes actually matched
+    written = [index for index in request_indexes if results[index]["status"] in (status.HTTP_200_OK, status.HTTP_204_NO_CONTENT)]
+    updates = [index for index in written if operations[index].op == "update"]
+    deletes = [index for index in written if operations[index].op == "delete"]
+    gone = deletes  # tasks these deletes removed
+    if len(updates) != matched or len(deletes) != deleted:
+        gone = await _reconcile_batch(operations, results, target_ids, owner_filter, updates, deletes, deleted)
+
+    # owners whose listings this batch changed
+    touched = {owners[target_ids[index]] for index in written
+               if results[index]["status"] < 300 or index in gone}
+    touched.update(owner_id for index, owner_id in created_owners.items()
+                   if results[index]["status"] == status.HTTP_201_CREATED)
+    await sync_service.record_tombstones("task", [
+        {"doc_id": target_ids[index], "owner_id": owners[target_ids[index]]}
+        for index in gone
+    ])
+    if touched:
+        await _tasks_changed(*touched)
+
+    return results
+
+
+async def _reconcile_batch(operations, results, target_ids, owner_filter, updates, deletes, deleted: int) -> list[int]:
+    """Find the batch writes that matched nothing; one ``$in`` query.
+
+    A task still matching the write filter was updated; one still present
+    but no longer matching was reassigned (403); a missing one was deleted
+    (404 for an update). For deletes, a missing task is ours unless more
+    tasks are missing than the bulk write deleted - then another request
+    deleted some in the same instant and, since the two cannot be told
+    apart, every missing one reports 404.
+
+    Returns the deletes whose task is gone, whoever removed it: all of them
+    get a tombstone (a duplicate is harmless, a missing one is not).
+    """
+    current = {}
+    async for task in database.db["tasks"].find(
+        {"_id": {"$in": [target_ids[index] for index in updates + deletes]}}, {"owner_id": 1}
+    ):
+        current[task["_id"]] = task["owner_id"]
+
+    def still_matches(task_id) -> bool:
+        return task_id in current and all(current[task_id] == value for value in owner_filter.values())
+
+    def miss(index, status_code, detail):
+        op = operations[index]
+        results[index] = {"index": index, "op": op.op, "id": op.id, "status": status_code, "detail": detail}
+
+    for index in updates:
+        task_id = target_ids[index]
+        if task_id not in current:
+            miss(index, status.HTTP_404_NOT_FOUND, "Task not found")
+        elif not still_matches(task_id):
+            miss(index, status.HTTP_403_FORBIDDEN, "Not allowed to update this task")
 
-    # 3️⃣ Delete
-    tasks_col.delete_one({"_id": task_id})
\ No newline at end of file
+    missing = [index for index in deletes if target_ids[index] not in current]
+    for index in deletes:
+        if target_ids[index] in current:
+            miss(index, status.HTTP_403_FORBIDDEN, "Not allowed to delete this task")
+        elif len(missing) > deleted:
+            miss(index, status.HTTP_404_NOT_FOUND, "Task not found")
+    return missing
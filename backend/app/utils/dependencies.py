@@ -2,12 +2,18 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
 
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.core import database
+from app.core.revocation import token_versions
+from app.core.user_cache import get_user_by_id
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# Claims that make a token self-sufficient for AUTH_MODE=claims
+CLAIMS_USER_FIELDS = ("sub", "email", "role", "ver")
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     payload = decode_access_token(token)
     if payload is None:
@@ -23,9 +29,23 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Invalid token payload"
         )
 
-    user = database.get_user_collection().find_one(
-        {"_id": ObjectId(user_id)}
-    )
+    if settings.AUTH_MODE == "claims" and all(k in payload for k in CLAIMS_USER_FIELDS):
+        is_current = token_versions.is_current(user_id, payload["ver"])
+        if is_current is False:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+        if is_current:
+            # Same shape as the users document, minus fields handlers never read
+            return {
+                "_id": ObjectId(user_id),
+                "email": payload["email"],
+                "role": payload["role"],
+                "token_version": payload["ver"],
+            }
+
+    user = await get_user_by_id(ObjectId(user_id))
 
     if user is None:
         raise HTTPException(
@@ -33,11 +53,17 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="User not found"
         )
 
+    if payload.get("ver", 0) < user.get("token_version", 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
     return user
 
 
 def require_role(required_role: str):
-    def role_checker(user=Depends(get_current_user)):
+    async def role_checker(user=Depends(get_current_user)):
         if user["role"] != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
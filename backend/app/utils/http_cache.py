@@ -0,0 +1,42 @@
+from fastapi import Request, Response
+
+from app.core import change_counters
+from app.core.config import settings
+
+
+ETAG_HEADER = "ETag"
+# Browsers and proxies may keep the body but must revalidate every time
+CACHE_CONTROL = "private, no-cache"
+
+
+async def listing_etag(request: Request, scopes: list[str]) -> str | None:
+    """ETag for a listing reading ``scopes``, or None with HTTP_ETAGS off."""
+    if not settings.HTTP_ETAGS:
+        return None
+    return await change_counters.etag(
+        scopes,
+        request.url.path,
+        request.url.query,
+        request.headers.get("accept", ""),
+    )
+
+
+def etag_matches(request: Request, etag: str | None) -> bool:
+    """Weak comparison against If-None-Match (RFC 9110 section 13.1.2)."""
+    if etag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def cache_headers(etag: str | None) -> dict:
+    return {ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL} if etag else {}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,51 @@
+import base64
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: datetime, _id: ObjectId) -> str:
+    """Opaque keyset cursor for the (value, _id) position of the last item served."""
+    raw = f"{value.isoformat()}|{_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, _id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(value), ObjectId(_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_filter(cursor: str, field: str = "created_at", descending: bool = True) -> dict:
+    """Everything strictly after ``cursor`` in (field, _id) order."""
+    value, _id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: _id}}
+        ]
+    }
+
+
+def next_cursor(items: list[dict], limit: int | None, field: str = "created_at") -> str | None:
+    """Cursor for the next page, or None when ``items`` is the last one.
+
+    Services fetch ``limit + 1`` rows; the extra row only proves another page
+    exists and is trimmed here.
+    """
+    if not limit or len(items) <= limit:
+        return None
+    del items[limit:]
+    last = items[-1]
+    return encode_cursor(last[field], last["_id"])
@@ -0,0 +1,22 @@
+"""
+Query helpers for GET /search.
+
+"text" mode uses the collection's text index (``database.INDEXES``): stemmed
+whole-word matches ranked by Mongo's text score. "prefix" mode is for
+search-as-you-type on titles, which the text index cannot do (it only
+matches whole words): an anchored, escaped regex evaluated on the notes or
+tasks the caller can already see, so the visibility index bounds the scan.
+"""
+import re
+
+TEXT_SCORE = {"$meta": "textScore"}
+# Best match first; _id keeps equal scores in a stable order across pages
+TEXT_SORT = [("score", TEXT_SCORE), ("_id", -1)]
+
+
+def text_filter(q: str) -> dict:
+    return {"$text": {"$search": q}}
+
+
+def prefix_filter(field: str, q: str) -> dict:
+    return {field: {"$regex": f"^{re.escape(q)}", "$options": "i"}}
@@ -0,0 +1,122 @@
+"""
+Fast JSON responses for listing routes.
+
+Routes build plain, already JSON-shaped dicts (ids as str, datetimes as
+datetime). Returning them normally makes FastAPI validate every item against
+``response_model`` and serialise it again; ``json_response`` encodes them
+straight to bytes instead - with orjson when installed, otherwise with
+pydantic-core's Rust encoder - and returns a raw ``Response``.
+
+The schemas stay the contract: with VALIDATE_RESPONSES=true (tests, staging)
+every fast response is first validated against its schema through a cached
+``TypeAdapter`` and a mismatch raises.
+
+``task_response`` and ``note_response`` turn stored documents into those
+dicts; every route that lists tasks or notes (listings, deltas, search)
+shares them.
+"""
+from functools import lru_cache
+
+import pydantic_core
+from bson import ObjectId
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.user_cache import get_users_by_ids
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return pydantic_core.to_json(content)
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def validate(content, schema):
+    """Raise ``pydantic.ValidationError`` unless ``content`` matches ``schema``."""
+    _adapter(schema).validate_python(content)
+
+
+def json_response(content, schema, headers: dict | None = None) -> Response:
+    if settings.VALIDATE_RESPONSES:
+        validate(content, schema)
+    return Response(dumps(content), media_type="application/json", headers=headers)
+
+
+def encode_items(items: list[dict], schema) -> list[bytes]:
+    """One JSON document per item, for the streaming encoders."""
+    if settings.VALIDATE_RESPONSES:
+        validate(items, list[schema])
+    return [dumps(item) for item in items]
+
+
+# -------------------------
+# Listing items
+# -------------------------
+
+def task_response(task):
+    return {
+        "id": str(task["_id"]),
+        "title": task["title"],
+        "description": task.get("description"),
+        "status": task["status"],
+        "owner_id": str(task["owner_id"]),
+        "created_at": task["created_at"],
+        "updated_at": task.get("updated_at"),
+        "updated_by": (
+            str(task["updated_by"]) if task.get("updated_by") else None),
+    }
+
+
+async def owner_emails(notes):
+    # Get all unique owner IDs (they are ObjectId objects from MongoDB)
+    # Filter out any invalid owner_ids and ensure we only have ObjectIds
+    # Notes joined server-side ("lookup" mode) already carry their owner_email
+    owner_ids_set = set()
+    for note in notes:
+        if "owner_email" in note:
+            continue
+        owner_id = note.get("owner_id")
+        if owner_id:
+            # owner_id from MongoDB should be an ObjectId
+            if isinstance(owner_id, ObjectId):
+                owner_ids_set.add(owner_id)
+
+    owner_ids = list(owner_ids_set)
+
+    # Resolve owner emails from the user cache, fetching only the misses in one query
+    owners = {}
+    if owner_ids:
+        for owner in (await get_users_by_ids(owner_ids)).values():
+            owners[str(owner["_id"])] = owner.get("email")
+    return owners
+
+
+def note_response(note, owners):
+    if "owner_email" in note:
+        owner_email = note["owner_email"]
+    elif isinstance(note.get("owner_id"), ObjectId):
+        owner_email = owners.get(str(note["owner_id"]))
+    else:
+        owner_email = None
+
+    return {
+        "id": str(note["_id"]),
+        "title": note["title"],
+        "content": note["content"],
+        "owner_id": str(note.get("owner_id", "")),
+        "owner_email": owner_email,
+        "visibility": note.get("visibility", "private"),
+        "created_at": note["created_at"],
+        "updated_at": note.get("updated_at")
+    }
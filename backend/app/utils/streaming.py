@@ -0,0 +1,59 @@
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+
+
+def stream_format(request: Request, stream: bool) -> str | None:
+    """"ndjson", "json" (a streamed array) or None for a regular response."""
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return "ndjson"
+    if stream:
+        return "json"
+    return None
+
+
+async def batched(documents: AsyncIterator[dict], size: int = STREAM_BATCH_SIZE):
+    batch = []
+    async for document in documents:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_response(
+    documents: AsyncIterator[dict],
+    encode_batch: Callable[[list[dict]], Awaitable[list[bytes]]],
+    fmt: str,
+) -> StreamingResponse:
+    """Write ``documents`` to the socket one cursor batch at a time.
+
+    Only one batch is held in memory, and the first bytes go out as soon as
+    the first batch is encoded, whatever the size of the result set.
+    """
+
+    async def body():
+        first = True
+        if fmt == "json":
+            yield b"["
+        async for batch in batched(documents):
+            chunk = []
+            for item in await encode_batch(batch):
+                if fmt == "ndjson":
+                    chunk.append(item + b"\n")
+                else:
+                    chunk.append(item if first else b"," + item)
+                    first = False
+            yield b"".join(chunk)
+        if fmt == "json":
+            yield b"]"
+
+    media_type = NDJSON_MEDIA_TYPE if fmt == "ndjson" else "application/json"
+    return StreamingResponse(body(), media_type=media_type)
@@ -0,0 +1,143 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The scripts run against a real mongod when ``--mongo-uri`` is given and
+otherwise against an in-process stand-in: mongomock wrapped in the same
+async adapter the app uses for the PyMongo driver, with an artificial
+per-operation round-trip latency so that blocking vs non-blocking I/O
+behaves like it does against a networked server.
+
+Extra dependencies (not needed by the app itself):
+
+    pip install mongomock httpx
+"""
+import asyncio
+import os
+import time
+from functools import partial
+
+# Settings() requires these at import time; benchmarks never talk to them.
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ADMIN_EMAIL", "admin@bench.local")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark-admin")
+# Load generators are one client on one IP; bench_rate_limit turns it back on.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from anyio import to_thread  # noqa: E402
+
+from app.core import database, query_stats  # noqa: E402
+from app.core.async_adapter import AsyncClientAdapter  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+
+
+def record(started: float, result):
+    """What the driver's command listener would report for one operation."""
+    docs = len(result) if isinstance(result, list) else 0
+    query_stats.record_command((time.perf_counter() - started) * 1000, docs)
+
+
+def blocking_runner(latency_ms: float):
+    """Blocking driver: the round trip occupies a worker thread."""
+
+    def call(fn, args, kwargs):
+        started = time.perf_counter()
+        time.sleep(latency_ms / 1000)
+        result = fn(*args, **kwargs)
+        record(started, result)
+        return result
+
+    async def run(fn, *args, **kwargs):
+        return await to_thread.run_sync(partial(call, fn, args, kwargs))
+
+    return run
+
+
+def async_runner(latency_ms: float):
+    """Non-blocking driver: the round trip is awaited on the event loop."""
+
+    async def run(fn, *args, **kwargs):
+        started = time.perf_counter()
+        await asyncio.sleep(latency_ms / 1000)
+        result = fn(*args, **kwargs)
+        record(started, result)
+        return result
+
+    return run
+
+
+async def install(mongo_uri: str | None, driver: str, latency_ms: float = 1.0,
+                  database_name: str = "benchmark"):
+    """Point ``app.core.database`` at a benchmark database and return it."""
+    settings.DATABASE_NAME = database_name
+
+    if mongo_uri:
+        settings.MONGODB_URI = mongo_uri
+        settings.MONGO_DRIVER = driver
+        database.client = database.create_client()
+    else:
+        import mongomock
+
+        runner = async_runner(latency_ms) if driver == "motor" else blocking_runner(latency_ms)
+        database.client = AsyncClientAdapter(mongomock.MongoClient(), runner=runner)
+
+    database.db = database.client[database_name]
+    return database.db
+
+
+async def reset(db, *collections):
+    for name in collections:
+        await db[name].delete_many({})
+
+
+def auth_headers(user: dict) -> dict:
+    token = create_access_token({"sub": str(user["_id"]), "role": user["role"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def run_load(app, method: str, path: str, total: int, concurrency: int,
+                   headers: dict | None = None, json=None) -> dict:
+    """Fire ``total`` requests with at most ``concurrency`` in flight."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.request(method, path, headers=headers, json=json)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def print_result(label: str, result: dict):
+    print(
+        f"{label:<28} {result['rps']:>9.1f} req/s   "
+        f"p50 {result['p50_ms']:>7.2f} ms   p99 {result['p99_ms']:>7.2f} ms   "
+        f"errors {result['errors']}"
+    )
@@ -0,0 +1,55 @@
+"""
+Throughput of GET /api/v1/tasks with the blocking vs the async data path.
+
+    python -m benchmarks.bench_async_io                     # in-process stand-in
+    python -m benchmarks.bench_async_io --mongo-uri mongodb://localhost:27017
+
+With the blocking driver every in-flight request holds one of AnyIO's 40
+worker threads for the whole Mongo round trip, so throughput flattens at
+roughly ``40 / latency``; the async driver keeps scaling with concurrency.
+"""
+import argparse
+import asyncio
+
+from benchmarks import _standin
+
+from app.main import app
+from app.models.task import TaskModel
+
+
+async def seed(db, tasks_per_user: int):
+    await _standin.reset(db, "users", "tasks")
+    result = await db["users"].insert_one(
+        {"email": "bench@bench.local", "password_hash": "x", "role": "user"}
+    )
+    user = await db["users"].find_one({"_id": result.inserted_id})
+    await db["tasks"].insert_many([
+        TaskModel(title=f"task {i}", description=None, owner_id=user["_id"]).to_dict()
+        for i in range(tasks_per_user)
+    ])
+    return user
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-uri")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="simulated round trip for the stand-in")
+    parser.add_argument("--tasks", type=int, default=20)
+    args = parser.parse_args()
+
+    for driver in ("pymongo", "motor"):
+        db = await _standin.install(args.mongo_uri, driver, args.latency_ms)
+        user = await seed(db, args.tasks)
+        headers = _standin.auth_headers(user)
+        for concurrency in args.concurrency:
+            result = await _standin.run_load(
+                app, "GET", "/api/v1/tasks", args.requests, concurrency, headers
+            )
+            _standin.print_result(f"{driver} c={concurrency}", result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Latency of task/note update and delete: find-then-write vs one conditional write.
+
+    python -m benchmarks.bench_conditional_writes                     # in-process stand-in
+    python -m benchmarks.bench_conditional_writes --mongo-uri mongodb://localhost:27017
+
+The legacy path (reproduced here) reads the document to check existence and
+ownership, then writes it. The service path folds the owner predicate into
+``find_one_and_update`` / ``find_one_and_delete``, saving that read; a
+second query runs only when it has to tell 404 from 403. Both paths then do
+the same follow-up writes (change-counter bump, and a tombstone on delete),
+so the difference is exactly the guard.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from benchmarks import _standin
+
+from bson import ObjectId
+
+from app.core import change_counters
+from app.models.note import NoteModel, compute_readers
+from app.models.task import TaskModel
+from app.schemas.note import NoteUpdate
+from app.schemas.task import TaskStatus, TaskUpdate
+from app.services import note_service, sync_service, task_services
+
+
+# -------------------------
+# Legacy two-step paths
+# -------------------------
+# Same writes and side effects as the services (audit fields, change-counter
+# bump, delete tombstone); only the guard differs: a read, then the write.
+
+async def legacy_update_task(db, task_id, data, user):
+    task = await db["tasks"].find_one({"_id": task_id})
+    if not task or (user["role"] != "admin" and task["owner_id"] != user["_id"]):
+        raise LookupError
+    update = {**data.model_dump(exclude_unset=True), "updated_at": datetime.utcnow(), "updated_by": user["_id"]}
+    await db["tasks"].update_one({"_id": task_id}, {"$set": update})
+    await task_services._tasks_changed(task["owner_id"])
+
+
+async def legacy_delete_task(db, task_id, user):
+    task = await db["tasks"].find_one({"_id": task_id})
+    if not task or (user["role"] != "admin" and task["owner_id"] != user["_id"]):
+        raise LookupError
+    await db["tasks"].delete_one({"_id": task_id})
+    await sync_service.record_tombstones("task", [{"doc_id": task_id, "owner_id": task["owner_id"]}])
+    await task_services._tasks_changed(task["owner_id"])
+
+
+async def legacy_update_note(db, note_id, data, user):
+    note = await db["notes"].find_one({"_id": note_id})
+    if not note or note["owner_id"] != user["_id"]:
+        raise LookupError
+    update = {**data.model_dump(exclude_unset=True), "updated_at": datetime.utcnow(), "updated_by": user["_id"]}
+    await db["notes"].update_one({"_id": note_id}, {"$set": update})
+    await change_counters.bump(*note_service._note_scopes(note["owner_id"], note["visibility"], note["shared_with"]))
+
+
+async def legacy_delete_note(db, note_id, user):
+    note = await db["notes"].find_one({"_id": note_id})
+    if not note or note["owner_id"] != user["_id"]:
+        raise LookupError
+    await db["notes"].delete_one({"_id": note_id})
+    await sync_service.record_tombstones("note", [{
+        "doc_id": note_id,
+        "readers": compute_readers(note["owner_id"], note["visibility"], note["shared_with"])
+    }])
+    await change_counters.bump(*note_service._note_scopes(note["owner_id"], note["visibility"], note["shared_with"]))
+
+
+async def seed(db, count: int, owner_id: ObjectId):
+    await _standin.reset(db, "tasks", "notes", "tombstones", "change_counters")
+    tasks = await db["tasks"].insert_many([
+        TaskModel(title=f"task {i}", description=None, owner_id=owner_id).to_dict()
+        for i in range(count)
+    ])
+    notes = await db["notes"].insert_many([
+        NoteModel(title=f"note {i}", content="c", owner_id=owner_id,
+                  visibility="private", shared_with=[]).to_dict()
+        for i in range(count)
+    ])
+    return tasks.inserted_ids, notes.inserted_ids
+
+
+async def timed(ids, fn, concurrency: int) -> dict:
+    latencies = []
+    queue = asyncio.Queue()
+    for _id in ids:
+        queue.put_nowait(_id)
+
+    async def worker():
+        while not queue.empty():
+            _id = queue.get_nowait()
+            started = time.perf_counter()
+            await fn(_id)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(ids),
+        "errors": 0,
+        "seconds": elapsed,
+        "rps": len(ids) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-uri")
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="simulated round trip for the stand-in")
+    args = parser.parse_args()
+
+    db = await _standin.install(args.mongo_uri, "motor", args.latency_ms)
+    user = {"_id": ObjectId(), "role": "user"}
+    task_update = TaskUpdate.model_construct(status=TaskStatus.done)
+    note_update = NoteUpdate.model_construct(title="renamed")
+
+    cases = [
+        ("update task", 0,
+         lambda _id: legacy_update_task(db, _id, task_update, user),
+         lambda _id: task_services.update_task(_id, task_update, user)),
+        ("update note", 1,
+         lambda _id: legacy_update_note(db, _id, note_update, user),
+         lambda _id: note_service.update_note(_id, note_update, user)),
+        ("delete task", 0,
+         lambda _id: legacy_delete_task(db, _id, user),
+         lambda _id: task_services.delete_task(_id, user)),
+        ("delete note", 1,
+         lambda _id: legacy_delete_note(db, _id, user),
+         lambda _id: note_service.delete_note(_id, user)),
+    ]
+
+    for name, which, legacy, conditional in cases:
+        for label, fn in (("find + write", legacy), ("conditional", conditional)):
+            ids = (await seed(db, args.operations, user["_id"]))[which]
+            result = await timed(ids, fn, args.concurrency)
+            _standin.print_result(f"{name}: {label}", result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+GET /events with thousands of idle subscribers, in-process.
+
+    python -m benchmarks.bench_events --subscribers 10000
+
+Opens ``--subscribers`` subscriptions on the event bus, each consumed by
+the same SSE generator the endpoint uses (``events.stream``), with
+``--slow`` of them never reading. It then reports the memory cost per
+subscriber, the time to fan one public-notes change out to every
+subscriber, and the time to deliver a change only one user can see (this
+should not depend on how many others are connected). It also reports
+event-loop lag while everyone sits idle on heartbeats, and the queue depth
+slow readers reach after a burst of changes (coalesced, so it stays bounded).
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks import _standin  # noqa: F401  (settings env defaults)
+
+from bson import ObjectId
+
+from app.core import events
+from app.services import note_service, task_services
+
+
+async def consume(subscription, heartbeat: float, delivered: dict):
+    async for chunk in events.stream(subscription, heartbeat):
+        if chunk.startswith(b"event: changed"):
+            delivered["count"] += 1
+            delivered["last"] = time.perf_counter()
+
+
+async def wait_delivered(delivered: dict, expected: int, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    while delivered["count"] < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0)
+
+
+async def loop_lag(seconds: float) -> float:
+    worst, end = 0.0, time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--slow", type=float, default=0.1, help="fraction that never read")
+    parser.add_argument("--heartbeat", type=float, default=1.0, help="seconds (15 in production)")
+    parser.add_argument("--burst", type=int, default=1000, help="changes published in one burst")
+    args = parser.parse_args()
+
+    bus = events.bus
+    bus.max_subscribers = args.subscribers
+    users = [{"_id": ObjectId(), "role": "user"} for _ in range(args.subscribers)]
+    slow_count = int(args.subscribers * args.slow)
+    delivered = {"count": 0, "last": 0.0}
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subscriptions, consumers = [], []
+    for i, user in enumerate(users):
+        scopes = note_service.note_list_scopes(user) + task_services.task_list_scopes(user)
+        subscription = bus.subscribe(scopes)
+        subscriptions.append(subscription)
+        if i >= slow_count:
+            consumers.append(asyncio.create_task(consume(subscription, args.heartbeat, delivered)))
+    await asyncio.sleep(0.5)
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / args.subscribers
+    tracemalloc.stop()
+    fast_count = args.subscribers - slow_count
+    print(f"{args.subscribers} subscribers ({slow_count} never read): {per_subscriber / 1024:.1f} KiB each")
+
+    started = time.perf_counter()
+    bus.publish(["notes:public"])
+    await wait_delivered(delivered, fast_count)
+    print(f"  public note change -> {delivered['count']} readers   {(delivered['last'] - started) * 1000:8.2f} ms")
+
+    delivered["count"] = 0
+    target = users[-1]
+    started = time.perf_counter()
+    bus.publish([f"tasks:user:{target['_id']}"])
+    await wait_delivered(delivered, 1)
+    print(f"  one user's task change -> {delivered['count']} reader      {(delivered['last'] - started) * 1000:8.2f} ms")
+
+    print(f"  idle event-loop lag (worst, {args.heartbeat * 3:g}s)   {await loop_lag(args.heartbeat * 3):8.2f} ms")
+
+    for _ in range(args.burst):
+        bus.publish(["notes:public", "notes:global", "tasks:fanout"])
+    deepest = max(subscription.queue.qsize() for subscription in subscriptions[:slow_count] or subscriptions)
+    print(f"  after a burst of {args.burst} changes: deepest slow-reader queue {deepest}, "
+          f"overflows {bus.overflows}")
+
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    for subscription in subscriptions:
+        bus.unsubscribe(subscription)
+    print(f"  subscribers left after disconnect: {bus.subscribers}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+Note access query latency before and after the notes index plan.
+
+    python -m benchmarks.bench_note_access --mongo-uri mongodb://localhost:27017 --notes 1000000
+
+Needs a real mongod (the stand-in has no query planner). Seeds ``--notes``
+notes over ``--users`` owners (~5% public, ~10% shared with 3 users), then
+times the visible-notes listing and the by-id lookup for sample users with
+only the ``_id`` index and again with ``database.INDEXES["notes"]``.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import _standin
+
+from bson import ObjectId
+
+from app.core import database
+from app.manage import plan_stages
+from app.services import note_service
+
+
+async def seed(db, notes: int, users: int) -> list[ObjectId]:
+    await _standin.reset(db, "notes")
+    user_ids = [ObjectId() for _ in range(users)]
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    for i in range(notes):
+        roll = random.random()
+        visibility = "public" if roll < 0.05 else "shared" if roll < 0.15 else "private"
+        batch.append({
+            "title": f"note {i}",
+            "content": "lorem ipsum " * 8,
+            "owner_id": random.choice(user_ids),
+            "visibility": visibility,
+            "shared_with": random.sample(user_ids, 3) if visibility == "shared" else [],
+            "created_at": start + timedelta(seconds=i),
+        })
+        if len(batch) == 10_000:
+            await db["notes"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db["notes"].insert_many(batch, ordered=False)
+    return user_ids
+
+
+async def timed(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+async def run(db, sample_users, page: int, repeats: int, label: str):
+    note = await db["notes"].find_one({"visibility": "shared"})
+    print(f"\n{label}")
+    for name, query, sort, limit in [
+        ("list visible (first page)", lambda u: note_service.visible_notes_query(u), note_service.NOTE_LIST_SORT, page),
+        ("get by id", lambda u: {"_id": note["_id"], **note_service.visible_notes_query(u)}, None, 1),
+    ]:
+        latencies, examined, stages = [], 0, []
+        for user_id in sample_users:
+            user = {"_id": user_id}
+
+            async def fetch():
+                cursor = db["notes"].find(query(user))
+                if sort:
+                    cursor = cursor.sort(sort)
+                await cursor.limit(limit).to_list(None)
+
+            latencies.append(await timed(fetch, repeats))
+            plan = await db.command(
+                "explain",
+                {"find": "notes", "filter": query(user), "sort": dict(sort or []), "limit": limit},
+                verbosity="executionStats",
+            )
+            stages = plan_stages(plan["queryPlanner"]["winningPlan"])
+            examined += plan["executionStats"]["totalDocsExamined"]
+        print(
+            f"  {name:<28} {sum(latencies) / len(latencies):>9.2f} ms   "
+            f"docs examined/query {examined // len(sample_users):>9}   "
+            f"{' <- '.join(stages)}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--sample-users", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    db = await _standin.install(args.mongo_uri, "motor")
+    if args.skip_seed:
+        user_ids = await db["notes"].distinct("owner_id")
+    else:
+        print(f"seeding {args.notes} notes over {args.users} users...")
+        user_ids = await seed(db, args.notes, args.users)
+    sample_users = random.sample(user_ids, args.sample_users)
+
+    await db["notes"].drop_indexes()
+    await run(db, sample_users, args.page, args.repeats, "before: _id index only")
+
+    await database.ensure_indexes()
+    await run(db, sample_users, args.page, args.repeats, "after: notes index plan")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
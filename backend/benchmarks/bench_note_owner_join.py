@@ -0,0 +1,91 @@
+"""
+Owner emails on GET /notes: user cache + second query vs $lookup join.
+
+    python -m benchmarks.bench_note_owner_join --mongo-uri mongodb://localhost:27017
+
+Needs a real mongod (the stand-in has no ``$lookup`` with ``let``). Seeds
+``--users`` users each owning public notes, so every page has as many
+distinct owners as notes, then times a page of the listing three ways:
+"cache" with a cold user cache (two round trips, every owner a miss),
+"cache" with a warm one, and "lookup" (one aggregation).
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import _standin
+
+from bson import ObjectId
+
+from app.utils.serialization import note_response, owner_emails
+from app.core import database
+from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.models.note import NoteModel
+from app.services import note_service
+
+
+async def seed(db, users: int, notes_per_user: int):
+    await _standin.reset(db, "users", "notes")
+    result = await db["users"].insert_many([
+        {"email": f"owner{i}@bench.local", "password_hash": "x", "role": "user"}
+        for i in range(users)
+    ])
+    batch = []
+    for round_ in range(notes_per_user):
+        for owner_id in result.inserted_ids:
+            batch.append(NoteModel(
+                title=f"note {round_}", content="lorem ipsum " * 8, owner_id=owner_id,
+                visibility="public", shared_with=[]
+            ).to_dict())
+            if len(batch) == 10_000:
+                await db["notes"].insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        await db["notes"].insert_many(batch, ordered=False)
+
+
+async def list_page(user, limit: int, cold: bool):
+    if cold:
+        user_cache.clear()
+    notes = await note_service.get_notes(user, limit)
+    owners = await owner_emails(notes)
+    return [note_response(note, owners) for note in notes]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--notes-per-user", type=int, default=2)
+    parser.add_argument("--limit", type=int, nargs="+", default=[50, 500, 1000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    db = await _standin.install(args.mongo_uri, "motor")
+    if not args.skip_seed:
+        print(f"seeding {args.users * args.notes_per_user} notes over {args.users} owners...")
+        await seed(db, args.users, args.notes_per_user)
+    await database.ensure_indexes()
+
+    reader = {"_id": ObjectId(), "role": "user"}
+    for limit in args.limit:
+        print(f"\nlimit={limit}")
+        for label, source, cold in [
+            ("cache (cold)", "cache", True),
+            ("cache (warm)", "cache", False),
+            ("lookup", "lookup", False),
+        ]:
+            settings.NOTES_OWNER_EMAIL_SOURCE = source
+            await list_page(reader, limit, cold)  # warm-up
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                page = await list_page(reader, limit, cold)
+            elapsed = (time.perf_counter() - started) / args.repeats * 1000
+            missing = sum(1 for note in page if not note["owner_email"])
+            print(f"  {label:<14} {elapsed:>9.2f} ms/page   notes {len(page):>5}   missing emails {missing}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
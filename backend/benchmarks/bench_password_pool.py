@@ -0,0 +1,60 @@
+"""
+Logins per second (bcrypt verifications) with and without the process pool.
+
+    python -m benchmarks.bench_password_pool --workers 1 2 4 --rounds 12
+
+"inline" is the old behaviour (verification in the threadpool, serialised
+on the GIL). For pooled runs the per-core figure divides by the number of
+worker processes actually doing bcrypt work.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks import _standin  # noqa: F401  (sets required env vars)
+
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.password_pool import PasswordPool
+
+
+async def measure(pool: PasswordPool, password_hash: str, logins: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        pool.run(security.verify_password, "correct horse", password_hash)
+        for _ in range(logins)
+    ))
+    return logins / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    password_hash = context.hash("correct horse")
+    print(f"bcrypt cost {args.rounds}, {args.logins} logins per run, {os.cpu_count()} CPUs")
+
+    inline = PasswordPool(workers=0, max_pending=args.logins)
+    rate = await measure(inline, password_hash, args.logins)
+    print(f"{'inline (threadpool)':<22} {rate:>8.1f} logins/s   {rate:>8.1f} /core")
+
+    for workers in args.workers:
+        pool = PasswordPool(workers=workers, max_pending=args.logins)
+        pool.start()
+        try:
+            await measure(pool, password_hash, workers)  # let every process boot
+            rate = await measure(pool, password_hash, args.logins)
+        finally:
+            pool.stop()
+        cores = min(workers, os.cpu_count() or 1)
+        print(f"{f'pool x{workers}':<22} {rate:>8.1f} logins/s   {rate / cores:>8.1f} /core")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
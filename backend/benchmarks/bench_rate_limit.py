@@ -0,0 +1,130 @@
+"""
+Rate limiting: cost of a check, and a login flood with and without limits.
+
+    python -m benchmarks.bench_rate_limit
+
+First the price of one bucket check per storage ("memory", and SQLite in a
+temp file standing in for shared storage), then the whole middleware
+decision for an authenticated request (JWT signature check included).
+
+Then an attacker floods POST /auth/login with wrong passwords from one IP
+while a regular user calls GET /users/me from another, against the
+in-process stand-in. Every login that gets past the limiter costs a bcrypt
+verification; "bcrypt runs" counts them.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks import _standin
+
+import httpx
+
+from app.core import rate_limit, security
+from app.core.config import settings
+from app.main import app
+from middleware.rate_limit import RateLimitMiddleware
+
+
+def checks_per_second(take, seconds: float) -> float:
+    done, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for i in range(1000):
+            take(i)
+        done += 1000
+    return done / (time.perf_counter() - started)
+
+
+def check_costs(seconds: float):
+    limit = rate_limit.Limit(1e9, 10 ** 9)  # never refuses: measures the bookkeeping only
+    memory = rate_limit.MemoryBuckets(max_keys=100_000)
+    sqlite = rate_limit.create_store(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'buckets.db')}")
+    for label, store in [("memory", memory), ("sqlite", sqlite)]:
+        hot = checks_per_second(lambda i: store.take("ip:10.0.0.1", limit), seconds)
+        spread = checks_per_second(lambda i: store.take(f"ip:10.0.{i % 250}.{i // 250}", limit), seconds)
+        print(f"  {label:<8} one key {hot:>12,.0f} checks/s   1000 keys {spread:>12,.0f} checks/s")
+
+    middleware = RateLimitMiddleware(app=None)
+    token = security.create_access_token({"sub": "6500000000000000000000aa", "role": "user"})
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/v1/tasks", "client": ("10.0.0.1", 1234),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    }
+    rate_limit.store = memory
+    rate = checks_per_second(lambda i: middleware._take(scope), seconds)
+    print(f"  middleware decision (JWT + user + ip buckets) {1e6 / rate:>8.1f} µs")
+
+
+async def flood(attackers: int, requests: int, user_headers: dict) -> dict:
+    attacker = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=("10.0.0.66", 4000)), base_url="http://bench"
+    )
+    regular = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=("10.0.0.7", 4000)), base_url="http://bench"
+    )
+    statuses, latencies = Counter(), []
+    remaining = requests
+
+    async def attack():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await attacker.post("/api/v1/auth/login", json={"email": "victim@example.com", "password": "wrong-password"})
+            statuses[response.status_code] += 1
+
+    async def browse():
+        while remaining > 0:
+            started = time.perf_counter()
+            response = await regular.get("/api/v1/users/me", headers=user_headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[f"user {response.status_code}"] += 1
+            await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(attack() for _ in range(attackers)), browse())
+    elapsed = time.perf_counter() - started
+    await attacker.aclose()
+    await regular.aclose()
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "bcrypt": statuses[401],
+        "refused": statuses[429] + statuses[503],
+        "user_p50": latencies[len(latencies) // 2] if latencies else 0,
+        "user_errors": sum(count for key, count in statuses.items() if str(key).startswith("user ") and key != "user 200"),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=1.0, help="run time per check benchmark")
+    parser.add_argument("--logins", type=int, default=100, help="attacker login attempts")
+    parser.add_argument("--attackers", type=int, default=8, help="concurrent attacker connections")
+    args = parser.parse_args()
+
+    print("bucket checks")
+    check_costs(args.seconds)
+
+    db = await _standin.install(None, "motor", latency_ms=1)
+    await _standin.reset(db, "users")
+    result = await db["users"].insert_one({
+        "email": "victim@example.com", "password_hash": security.hash_password("correct horse"), "role": "user"
+    })
+    user_headers = _standin.auth_headers({"_id": result.inserted_id, "role": "user"})
+
+    print(f"\nlogin flood: {args.logins} attempts over {args.attackers} connections, bcrypt cost {settings.BCRYPT_ROUNDS}")
+    for enabled in (False, True):
+        settings.RATE_LIMIT_ENABLED = enabled
+        rate_limit.store = rate_limit.create_store("memory")
+        r = await flood(args.attackers, args.logins, user_headers)
+        print(
+            f"  limits {'on ' if enabled else 'off'}  {r['seconds']:6.2f} s   bcrypt runs {r['bcrypt']:>5}   "
+            f"refused {r['refused']:>5}   regular user p50 {r['user_p50']:8.2f} ms   errors {r['user_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+GET /search over a large synthetic corpus: regex scan vs text index vs prefix.
+
+    python -m benchmarks.bench_search --mongo-uri mongodb://localhost:27017
+
+Needs a real mongod (the stand-in has no ``$text``). Seeds ``--notes`` notes
+and as many tasks whose titles and bodies are drawn from a ``--vocabulary``
+of synthetic words, spread over ``--owners`` users with a mix of private,
+public and shared notes, then times one page of results per query for a
+regular user:
+
+* "regex scan" - an unanchored, case-insensitive regex over title and body,
+  the obvious implementation without a text index (reads every visible doc)
+* "text"       - ``note_service.search_notes`` / ``task_services.search_tasks``
+* "prefix"     - the same with ``mode=prefix`` on the first letters of a word
+"""
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+
+from benchmarks import _standin
+
+from bson import ObjectId
+
+from app.core import database
+from app.models.note import NoteModel
+from app.models.task import TaskModel
+from app.services import note_service, task_services
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "vo", "ri", "pe", "du", "an", "el", "or", "is"]
+
+
+def vocabulary(size: int, rng: random.Random) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def phrase(words: list[str], rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(words) for _ in range(length))
+
+
+async def seed(db, notes: int, owners: list, words: list[str], rng: random.Random):
+    await _standin.reset(db, "notes", "tasks")
+    note_batch, task_batch = [], []
+    for i in range(notes):
+        owner = owners[i % len(owners)]
+        visibility = rng.choice(["private", "private", "public", "shared"])
+        note_batch.append(NoteModel(
+            title=phrase(words, rng, 4), content=phrase(words, rng, 40), owner_id=owner,
+            visibility=visibility,
+            shared_with=rng.sample(owners, 3) if visibility == "shared" else []
+        ).to_dict())
+        task_batch.append(TaskModel(
+            title=phrase(words, rng, 4), description=phrase(words, rng, 20),
+            status="pending", owner_id=owner
+        ).to_dict())
+        if len(note_batch) == 10_000:
+            await db["notes"].insert_many(note_batch, ordered=False)
+            await db["tasks"].insert_many(task_batch, ordered=False)
+            note_batch, task_batch = [], []
+    if note_batch:
+        await db["notes"].insert_many(note_batch, ordered=False)
+        await db["tasks"].insert_many(task_batch, ordered=False)
+
+
+async def regex_scan(user, q: str, limit: int):
+    pattern = {"$regex": re.escape(q), "$options": "i"}
+    notes = await database.db["notes"].find(
+        {"$and": [note_service.visible_notes_query(user),
+                  {"$or": [{"title": pattern}, {"content": pattern}]}]},
+        note_service.NOTE_LIST_PROJECTION
+    ).sort(note_service.NOTE_LIST_SORT).limit(limit).to_list(None)
+    tasks = await database.db["tasks"].find(
+        {**task_services.task_list_query(user), "$or": [{"title": pattern}, {"description": pattern}]},
+        task_services.TASK_LIST_PROJECTION
+    ).sort(task_services.TASK_LIST_SORT).limit(limit).to_list(None)
+    return notes, tasks
+
+
+async def indexed(user, q: str, limit: int, mode: str):
+    notes = await note_service.search_notes(user, q, mode, limit)
+    tasks = await task_services.search_tasks(user, q, mode, limit=limit)
+    return notes[:limit], tasks[:limit]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument("--notes", type=int, default=200_000)
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    words = vocabulary(args.vocabulary, rng)
+    owners = [ObjectId() for _ in range(args.owners)]
+
+    db = await _standin.install(args.mongo_uri, "motor")
+    if not args.skip_seed:
+        print(f"seeding {args.notes} notes and {args.notes} tasks...")
+        await seed(db, args.notes, owners, words, rng)
+    await database.ensure_indexes()
+
+    user = {"_id": owners[0], "role": "user"}
+    queries = [rng.choice(words) for _ in range(args.queries)]
+    for label, run, q_of in [
+        ("regex scan", lambda q: regex_scan(user, q, args.limit), lambda w: w),
+        ("text", lambda q: indexed(user, q, args.limit, "text"), lambda w: w),
+        ("prefix", lambda q: indexed(user, q, args.limit, "prefix"), lambda w: w[:3]),
+    ]:
+        await run(q_of(queries[0]))  # warm-up
+        timings, hits = [], 0
+        for word in queries:
+            started = time.perf_counter()
+            notes, tasks = await run(q_of(word))
+            timings.append((time.perf_counter() - started) * 1000)
+            hits += len(notes) + len(tasks)
+        print(
+            f"  {label:<12} p50 {statistics.median(timings):>8.2f} ms   "
+            f"max {max(timings):>8.2f} ms   hits/query {hits / len(queries):>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
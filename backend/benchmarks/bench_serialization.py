@@ -0,0 +1,104 @@
+"""
+Listing serialisation throughput: response_model validation vs direct encoding.
+
+    python -m benchmarks.bench_serialization --items 1000
+
+Single-threaded, so the numbers are items per second per core. "response_model"
+reproduces what FastAPI does with a returned list of dicts (validate each
+item, dump to JSON-able python, ``json.dumps``); the other rows encode the
+same dicts straight to bytes as ``app.utils.serialization`` does.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import _standin  # noqa: F401  (settings env defaults)
+
+import pydantic_core
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.schemas.note import NoteResponse
+from app.schemas.task import TaskResponse
+from app.utils import serialization
+
+
+def task_items(count: int) -> list[dict]:
+    now = datetime.utcnow()
+    owner = str(ObjectId())
+    return [
+        {
+            "id": str(ObjectId()),
+            "title": f"task {i}",
+            "description": "lorem ipsum dolor sit amet",
+            "status": "pending",
+            "owner_id": owner,
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": None,
+            "updated_by": None,
+        }
+        for i in range(count)
+    ]
+
+
+def note_items(count: int) -> list[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(ObjectId()),
+            "title": f"note {i}",
+            "content": "lorem ipsum " * 8,
+            "owner_id": str(ObjectId()),
+            "owner_email": f"user{i}@example.com",
+            "visibility": "public",
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": now - timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def response_model_path(adapter: TypeAdapter):
+    def encode(items):
+        validated = adapter.validate_python(items)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    return encode
+
+
+def rate(encode, items, seconds: float) -> float:
+    done, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        encode(items)
+        done += len(items)
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000, help="items per response")
+    parser.add_argument("--seconds", type=float, default=2.0, help="run time per case")
+    args = parser.parse_args()
+
+    for label, schema, items in [
+        ("tasks", TaskResponse, task_items(args.items)),
+        ("notes", NoteResponse, note_items(args.items)),
+    ]:
+        adapter = TypeAdapter(list[schema])
+        cases = [
+            ("response_model", response_model_path(adapter)),
+            ("pydantic-core to_json", pydantic_core.to_json),
+        ]
+        if serialization.orjson is not None:
+            cases.append(("orjson", serialization.orjson.dumps))
+
+        reference = json.loads(cases[0][1](items))
+        print(f"\n{label} ({args.items} items/response)")
+        for name, encode in cases:
+            assert json.loads(encode(items)) == reference, f"{name} output differs"
+            print(f"  {name:<24} {rate(encode, items, args.seconds):>12,.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import time
+
+from app.core import metrics
+
+
+class MetricsMiddleware:
+    """Per-route request counts, latency histogram and in-flight gauge.
+
+    Routes are labelled by their template (``/api/v1/tasks/{task_id}``), read
+    from the scope after routing, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.http_in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            metrics.http_requests.inc(scope["method"], template, str(status_code))
+            metrics.http_request_duration.observe(time.perf_counter() - started, scope["method"], template)
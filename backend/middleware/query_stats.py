@@ -0,0 +1,61 @@
+import logging
+import time
+
+from app.core import query_stats
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+logger = logging.getLogger("app.requests")
+
+
+class QueryStatsMiddleware:
+    """Attribute Mongo commands to each request and report them.
+
+    Adds ``X-DB-Query-Count`` and a ``Server-Timing`` header (``db`` = time
+    spent in Mongo, ``app`` = total time until the headers went out) and logs
+    one ``request ...`` line per request on ``app.requests``.
+
+    Plain ASGI rather than BaseHTTPMiddleware so the endpoint runs in the same
+    context as the contextvar set here. For streamed responses the headers go
+    out with the first chunk and so only cover the commands made up to then;
+    the log line covers the whole response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status_code = 500
+
+        with query_stats.track(f"{scope['method']} {scope['path']}") as stats:
+
+            async def send_with_stats(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    app_ms = (time.perf_counter() - started) * 1000
+                    timing = f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", app;dur={app_ms:.1f}'
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                    headers.append((SERVER_TIMING_HEADER.lower().encode(), timing.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                logger.info(
+                    "request method=%s path=%s status=%d duration_ms=%.1f db_queries=%d db_ms=%.1f db_docs=%d",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    (time.perf_counter() - started) * 1000,
+                    stats.count,
+                    stats.duration_ms,
+                    stats.docs,
+                )
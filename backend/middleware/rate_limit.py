@@ -0,0 +1,120 @@
+import math
+
+from fastapi.responses import JSONResponse
+
+from app.core import metrics, rate_limit
+from app.core.config import settings
+from app.core.security import decode_access_token
+
+RETRY_AFTER_HEADER = "Retry-After"
+
+# Probes and scrapes must keep answering on an overloaded worker
+EXEMPT_PATHS = {"/health", "/livez", "/readyz", "/metrics"}
+# Open for minutes by design; rate limited on connect but not counted as in flight
+LONG_LIVED_PATHS = {"/api/v1/events"}
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_ip(scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def user_id(scope) -> str | None:
+    """Subject of a validly signed bearer token; anything else counts as anonymous."""
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    payload = decode_access_token(authorization[7:])
+    return payload.get("sub") if payload else None
+
+
+class RateLimitMiddleware:
+    """Load shedding, then per-IP, per-user and per-route token buckets.
+
+    Runs before routing and authentication, so a refused request costs a
+    couple of dict lookups (and a JWT signature check when it carries a
+    token) - never a database query or a bcrypt hash. Refusals are JSON
+    ``{"detail": ...}`` like any HTTPException, with ``Retry-After``:
+
+    * 503 when this worker already serves SHED_MAX_IN_FLIGHT requests or its
+      event loop lags more than SHED_MAX_LOOP_LAG_MS behind;
+    * 429 when the client's IP, user or route bucket is empty.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+
+    def _shed_reason(self) -> str | None:
+        if settings.SHED_MAX_IN_FLIGHT and self.in_flight >= settings.SHED_MAX_IN_FLIGHT:
+            return "in_flight"
+        if settings.SHED_MAX_LOOP_LAG_MS and rate_limit.loop_lag.lag_ms >= settings.SHED_MAX_LOOP_LAG_MS:
+            return "loop_lag"
+        return None
+
+    def _take(self, scope) -> tuple[str, float] | None:
+        """(bucket kind, seconds to wait) for the first empty bucket, else None."""
+        ip = client_ip(scope)
+        uid = user_id(scope)
+        client = f"user:{uid}" if uid else f"ip:{ip}"
+
+        checks = []
+        route_limit = rate_limit.ROUTE_LIMITS.get((scope["method"], scope["path"]))
+        if route_limit:
+            checks.append(("route", f"route:{scope['method']} {scope['path']}:{client}", route_limit))
+        if uid:
+            checks.append(("user", client, rate_limit.USER_LIMIT))
+        checks.append(("ip", f"ip:{ip}", rate_limit.IP_LIMIT))
+
+        for kind, key, limit in checks:
+            wait = rate_limit.store.take(key, limit)
+            if wait:
+                return kind, wait
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"] in EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+
+        # 1️⃣ Overloaded worker: refuse before doing any per-client work
+        reason = self._shed_reason()
+        if reason:
+            metrics.http_rejected.inc(reason)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is overloaded, retry shortly"},
+                headers={RETRY_AFTER_HEADER: str(settings.SHED_RETRY_AFTER_SECONDS)}
+            )
+            return await response(scope, receive, send)
+
+        # 2️⃣ Token buckets, most specific first
+        refused = self._take(scope)
+        if refused:
+            kind, wait = refused
+            metrics.http_rejected.inc(f"rate_limit_{kind}")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={RETRY_AFTER_HEADER: str(math.ceil(wait))}
+            )
+            return await response(scope, receive, send)
+
+        if scope["path"] in LONG_LIVED_PATHS:
+            return await self.app(scope, receive, send)
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
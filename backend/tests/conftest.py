@@ -0,0 +1,115 @@
+import os
+
+# Settings() requires these at import time; the tests never talk to them.
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("ADMIN_PASSWORD", "test-admin-password")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# Every fast response is checked against its response_model
+os.environ.setdefault("VALIDATE_RESPONSES", "true")
+
+import httpx  # noqa: E402
+import mongomock  # noqa: E402
+import pytest  # noqa: E402
+from bson import ObjectId  # noqa: E402
+
+from app.core import database, query_stats  # noqa: E402
+from app.core.async_adapter import AsyncClientAdapter, AsyncCursorAdapter  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.core.user_cache import user_cache  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import UserModel  # noqa: E402
+
+
+class CommandLog(list):
+    """(collection, operation) of every database round trip, in order."""
+
+    def __init__(self):
+        super().__init__()
+        self.hooks = {}
+
+    def on(self, collection: str) -> list[str]:
+        return [operation for name, operation in self if name == collection]
+
+    def before(self, collection: str, operation: str, hook):
+        """Run ``hook()`` just before the next such command - e.g. a concurrent write."""
+        self.hooks.setdefault((collection, operation), []).append(hook)
+
+
+def _target(fn) -> tuple[str | None, str]:
+    owner = getattr(fn, "__self__", None)
+    if isinstance(owner, AsyncCursorAdapter):
+        # a find/aggregate cursor fetching its next batch
+        opener = owner._open_cursor
+        return opener.func.__self__.name, opener.func.__name__
+    return getattr(owner, "name", None), fn.__name__
+
+
+def recording_runner(log: CommandLog):
+    """Run mongomock calls inline, counted like the driver's command listener would."""
+
+    async def run(fn, *args, **kwargs):
+        target = _target(fn)
+        for hook in log.hooks.pop(target, []):
+            hook()
+        log.append(target)
+        query_stats.record_command()
+        return fn(*args, **kwargs)
+
+    return run
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def commands() -> CommandLog:
+    return CommandLog()
+
+
+@pytest.fixture
+async def db(commands):
+    """A fresh in-memory database behind the app's async adapter."""
+    database.client = AsyncClientAdapter(mongomock.MongoClient(), runner=recording_runner(commands))
+    database.db = database.client["test"]
+    await database.ensure_indexes()
+    user_cache.clear()
+    commands.clear()
+    yield database.db
+    user_cache.clear()
+
+
+@pytest.fixture
+async def client(db):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def create_user(db, email: str, role: str = "user") -> dict:
+    user = {"_id": ObjectId(), **UserModel(email=email, password_hash="unused", role=role).to_dict()}
+    await db["users"].insert_one(user)
+    user_cache.put(user)
+    return user
+
+
+def auth_headers(user: dict) -> dict:
+    token = create_access_token({"sub": str(user["_id"]), "role": user["role"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def alice(db, commands):
+    user = await create_user(db, "alice@example.com")
+    commands.clear()
+    return user
+
+
+@pytest.fixture
+async def bob(db, commands):
+    user = await create_user(db, "bob@example.com")
+    commands.clear()
+    return user
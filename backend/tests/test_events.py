@@ -0,0 +1,38 @@
+import anyio
+import pytest
+
+from app.api.v1.events import stream_events
+from app.core import events
+
+pytestmark = pytest.mark.anyio
+
+SCOPE = {"type": "http", "method": "GET", "path": "/api/v1/events", "headers": []}
+
+
+async def test_subscription_released_when_response_start_fails(alice):
+    response = await stream_events(current_user=alice)
+    assert events.bus.subscribers == 1
+
+    async def receive():
+        await anyio.sleep_forever()  # the client never disconnects
+
+    async def send(message):
+        raise OSError("client went away")
+
+    # anyio's task group may wrap it in an ExceptionGroup
+    with pytest.raises((OSError, ExceptionGroup)):
+        await response(SCOPE, receive, send)
+    assert events.bus.subscribers == 0
+
+
+async def test_subscription_released_when_client_left_before_body(alice):
+    response = await stream_events(current_user=alice)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await response(SCOPE, receive, send)
+    assert events.bus.subscribers == 0
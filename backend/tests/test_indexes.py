@@ -0,0 +1,25 @@
+import pytest
+
+from app.core import database, migrations
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def tombstone_ttl(db) -> int:
+    return (await db["tombstones"].index_information())["deleted_at_1"]["expireAfterSeconds"]
+
+
+async def test_tombstone_ttl_change_retunes_index(db, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_TOMBSTONE_TTL_DAYS", 30)
+    await database.ensure_indexes()
+    index_migration, ttl_migration = (migration_id for migration_id, _ in migrations.migrations()[:2])
+    assert await tombstone_ttl(db) == 30 * 24 * 3600
+
+    monkeypatch.setattr(settings, "SYNC_TOMBSTONE_TTL_DAYS", 7)
+    await database.ensure_indexes()  # no IndexOptionsConflict
+
+    assert await tombstone_ttl(db) == 7 * 24 * 3600
+    # only the TTL migration runs again
+    assert migrations.migrations()[0][0] == index_migration
+    assert migrations.migrations()[1][0] != ttl_migration
@@ -0,0 +1,23 @@
+from argparse import Namespace
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import manage
+from app.models.note import NoteModel
+from app.services import note_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_owner_email_rebuild_is_seen_by_delta_sync_and_etags(db, alice):
+    long_ago = datetime.utcnow() - timedelta(days=1)
+    note = NoteModel("Note", "text", alice["_id"], owner_email="old@example.com", created_at=long_ago)
+    note_id = (await db["notes"].insert_one(note.to_dict())).inserted_id
+
+    assert await manage.rebuild_note_owner_emails(Namespace(batch_size=100)) == 0
+
+    repaired = await db["notes"].find_one({"_id": note_id})
+    assert repaired["owner_email"] == alice["email"]
+    assert repaired["updated_at"] > long_ago
+    assert await db["change_counters"].find_one({"_id": note_service.NOTES_GLOBAL_SCOPE})
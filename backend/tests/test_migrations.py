@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import anyio
+import pytest
+from bson import ObjectId
+
+from app.core import migrations
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+MIGRATION_ID = "test-migration"
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def migrate():
+        calls.append(MIGRATION_ID)
+
+    monkeypatch.setattr(migrations, "migrations", lambda: [(MIGRATION_ID, migrate)])
+    monkeypatch.setattr(migrations, "POLL_SECONDS", 0.01)
+    return calls
+
+
+async def claimed_elsewhere(db, age_seconds: float = 0):
+    claimed_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    await db["schema_migrations"].insert_one({
+        "_id": MIGRATION_ID, "status": "running", "claimed_by": ObjectId(),
+        "claimed_at": claimed_at, "started_at": claimed_at,
+    })
+
+
+async def test_runs_once_and_records_done(db, calls):
+    assert await migrations.run_pending() == [MIGRATION_ID]
+    assert await migrations.run_pending() == []
+    assert calls == [MIGRATION_ID]
+    assert (await db["schema_migrations"].find_one({"_id": MIGRATION_ID}))["status"] == "done"
+
+
+async def test_loser_waits_for_done(db, calls):
+    await claimed_elsewhere(db)
+    finished = []
+
+    async def other_worker_finishes():
+        await anyio.sleep(0.05)
+        finished.append(True)
+        await db["schema_migrations"].update_one({"_id": MIGRATION_ID}, {"$set": {"status": "done"}})
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(other_worker_finishes)
+        assert await migrations.run_pending() == []
+        assert finished  # did not return before the other worker was done
+
+    assert calls == []
+
+
+async def test_loser_takes_over_after_winner_fails(db, calls):
+    await claimed_elsewhere(db)
+
+    async def other_worker_fails():
+        await anyio.sleep(0.05)
+        await db["schema_migrations"].delete_one({"_id": MIGRATION_ID})
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(other_worker_fails)
+        assert await migrations.run_pending() == [MIGRATION_ID]
+
+    assert calls == [MIGRATION_ID]
+
+
+async def test_expired_running_marker_is_reclaimed(db, calls):
+    await claimed_elsewhere(db, age_seconds=settings.MIGRATION_LEASE_SECONDS + 1)
+
+    assert await migrations.run_pending() == [MIGRATION_ID]
+    assert calls == [MIGRATION_ID]
+
+
+async def test_wait_times_out(db, calls, monkeypatch):
+    monkeypatch.setattr(settings, "MIGRATION_WAIT_SECONDS", 0)
+    await claimed_elsewhere(db)
+
+    with pytest.raises(RuntimeError, match="Timed out"):
+        await migrations.run_pending()
+    assert calls == []
@@ -0,0 +1,179 @@
+"""
+Database round trips per endpoint, pinned so a refactor that quietly adds a
+read-before-write or a per-item lookup fails here.
+
+Users are in the user cache (as after their first request), so only the
+endpoint's own commands are counted. Every successful write also bumps the
+change counters behind the ETags: one ``bulk_write`` on ``change_counters``.
+"""
+import pytest
+
+from app.core import query_stats
+from app.models.note import NoteModel
+from app.models.task import TaskModel
+from app.schemas.note import NoteCreate
+from app.services import note_service
+from middleware.query_stats import QUERY_COUNT_HEADER
+
+from tests.conftest import auth_headers
+
+pytestmark = pytest.mark.anyio
+
+BUMP = [("change_counters", "bulk_write")]
+
+
+async def insert_task(db, owner) -> str:
+    result = await db["tasks"].insert_one(TaskModel("Task", None, owner["_id"]).to_dict())
+    return str(result.inserted_id)
+
+
+async def insert_note(db, owner, visibility="private") -> str:
+    note = NoteModel("Note", "text", owner["_id"], visibility=visibility, owner_email=owner["email"])
+    result = await db["notes"].insert_one(note.to_dict())
+    return str(result.inserted_id)
+
+
+def query_count(response) -> int:
+    return int(response.headers[QUERY_COUNT_HEADER])
+
+
+# -------------------------
+# Notes
+# -------------------------
+
+async def test_create_note_is_one_insert(client, commands, alice):
+    response = await client.post(
+        "/api/v1/notes",
+        json={"title": "Plan", "content": "text", "visibility": "public"},
+        headers=auth_headers(alice),
+    )
+
+    assert response.status_code == 201
+    assert response.json()["owner_email"] == alice["email"]
+    assert commands == [("notes", "insert_one"), *BUMP]
+    assert query_count(response) == 2
+
+
+async def test_create_note_service_is_one_insert(db, commands, alice):
+    with query_stats.track() as stats:
+        note = await note_service.create_note(NoteCreate(title="Plan", content="text"), alice)
+
+    assert note["_id"]
+    assert commands.on("notes") == ["insert_one"]
+    assert stats.count == 2
+
+
+async def test_update_note_is_one_conditional_write(client, db, commands, alice):
+    note_id = await insert_note(db, alice)
+    commands.clear()
+
+    response = await client.patch(
+        f"/api/v1/notes/{note_id}",
+        json={"title": "Renamed", "content": None, "visibility": None, "shared_with_emails": None},
+        headers=auth_headers(alice),
+    )
+
+    assert response.status_code == 200
+    assert commands == [("notes", "find_one_and_update"), *BUMP]
+
+
+async def test_delete_note_is_one_conditional_write(client, db, commands, alice):
+    note_id = await insert_note(db, alice)
+    commands.clear()
+
+    response = await client.delete(f"/api/v1/notes/{note_id}", headers=auth_headers(alice))
+
+    assert response.status_code == 204
+    # plus the delta-sync tombstone
+    assert commands == [("notes", "find_one_and_delete"), ("tombstones", "insert_many"), *BUMP]
+
+
+async def test_denied_note_write_adds_one_lookup(client, db, commands, alice, bob):
+    note_id = await insert_note(db, alice)
+    commands.clear()
+
+    response = await client.delete(f"/api/v1/notes/{note_id}", headers=auth_headers(bob))
+
+    assert response.status_code == 403
+    assert commands == [("notes", "find_one_and_delete"), ("notes", "find_one")]
+
+
+async def test_unchanged_note_listing_reads_only_change_counters(client, db, commands, alice):
+    await insert_note(db, alice, visibility="public")
+    headers = auth_headers(alice)
+    etag = (await client.get("/api/v1/notes", headers=headers)).headers["etag"]
+    commands.clear()
+
+    response = await client.get("/api/v1/notes", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert commands == [("change_counters", "find")]
+    assert query_count(response) == 1
+
+
+# -------------------------
+# Tasks
+# -------------------------
+
+async def test_update_task_is_one_conditional_write(client, db, commands, alice):
+    task_id = await insert_task(db, alice)
+    commands.clear()
+
+    response = await client.patch(
+        f"/api/v1/tasks/{task_id}",
+        json={"title": "Renamed", "description": None, "status": "done"},
+        headers=auth_headers(alice),
+    )
+
+    assert response.status_code == 200
+    assert commands == [("tasks", "find_one_and_update"), *BUMP]
+
+
+async def test_delete_task_is_one_conditional_write(client, db, commands, alice):
+    task_id = await insert_task(db, alice)
+    commands.clear()
+
+    response = await client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers(alice))
+
+    assert response.status_code == 204
+    assert commands == [("tasks", "find_one_and_delete"), ("tombstones", "insert_many"), *BUMP]
+
+
+async def test_denied_task_write_adds_one_lookup(client, db, commands, alice, bob):
+    task_id = await insert_task(db, alice)
+    commands.clear()
+
+    response = await client.patch(
+        f"/api/v1/tasks/{task_id}",
+        json={"title": "Mine now", "description": None, "status": None},
+        headers=auth_headers(bob),
+    )
+
+    assert response.status_code == 403
+    assert commands == [("tasks", "find_one_and_update"), ("tasks", "find_one")]
+
+
+async def test_task_listing_is_one_query(client, db, commands, alice):
+    for _ in range(3):
+        await insert_task(db, alice)
+    commands.clear()
+
+    response = await client.get("/api/v1/tasks", headers=auth_headers(alice))
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert commands == [("change_counters", "find"), ("tasks", "find")]
+
+
+async def test_unchanged_task_listing_reads_only_change_counters(client, db, commands, alice):
+    await insert_task(db, alice)
+    headers = auth_headers(alice)
+    etag = (await client.get("/api/v1/tasks", headers=headers)).headers["etag"]
+    commands.clear()
+
+    response = await client.get("/api/v1/tasks", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert commands.on("tasks") == []
+    assert commands == [("change_counters", "find")]
+    assert query_count(response) == 1
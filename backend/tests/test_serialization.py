@@ -0,0 +1,124 @@
+"""
+The fast listing path (``encode_items``/``json_response``) must produce the
+same bytes as FastAPI's ``response_model`` path for the documents the
+listing routes actually read.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from pydantic import TypeAdapter
+
+from app.models.note import NoteModel
+from app.models.task import TaskModel
+from app.schemas.note import NoteResponse
+from app.schemas.task import TaskResponse
+from app.utils import serialization
+from app.utils.serialization import encode_items, json_response, note_response, task_response
+
+OWNER_ID = ObjectId()
+EDITOR_ID = ObjectId()
+# Mongo stores milliseconds, so that is what listings read back
+CREATED_AT = datetime(2024, 5, 1, 9, 30, 15, 123000)
+UPDATED_AT = datetime(2024, 5, 2, 18, 0)
+
+
+def _stored(model) -> dict:
+    return {"_id": ObjectId(), **model.to_dict()}
+
+
+def task_documents() -> list[dict]:
+    fresh = _stored(TaskModel("Write report", "Quarterly numbers", OWNER_ID, created_at=CREATED_AT))
+    edited = _stored(TaskModel(
+        "Café ☕ run", None, OWNER_ID, status="done",
+        created_at=CREATED_AT, updated_at=UPDATED_AT, updated_by=EDITOR_ID
+    ))
+    # written before updated_at/updated_by existed, description never set
+    legacy = _stored(TaskModel("Legacy", None, OWNER_ID, created_at=CREATED_AT))
+    for field in ("description", "updated_at", "updated_by"):
+        del legacy[field]
+    return [fresh, edited, legacy]
+
+
+def note_documents() -> list[dict]:
+    denormalised = _stored(NoteModel(
+        "Shared plan", "Steps \"1\" & 2\n", OWNER_ID, visibility="shared",
+        shared_with=[EDITOR_ID], owner_email="owner@example.com", created_at=CREATED_AT
+    ))
+    # written before owner_email and updated_at were stored
+    legacy = _stored(NoteModel("Old", "ünïcode", OWNER_ID, visibility="public", created_at=CREATED_AT))
+    del legacy["owner_email"], legacy["updated_at"]
+    # visibility missing entirely: listed as private
+    bare = _stored(NoteModel("Bare", "text", OWNER_ID, created_at=UPDATED_AT))
+    del bare["visibility"], bare["owner_email"]
+    return [denormalised, legacy, bare]
+
+
+def response_model_body(content, schema) -> bytes:
+    """What FastAPI sends when the route returns ``content`` with ``response_model=schema``."""
+    app = FastAPI()
+
+    @app.get("/", response_model=schema)
+    async def route():
+        return content
+
+    # the two steps FastAPI's request handler takes after the endpoint returns
+    route = app.routes[-1]
+    encoded = asyncio.run(serialize_response(field=route.response_field, response_content=content))
+    return JSONResponse(encoded).body
+
+
+@pytest.fixture(params=["orjson", "pydantic-core"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        if serialization.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def tasks() -> list[dict]:
+    return [task_response(task) for task in task_documents()]
+
+
+def notes() -> list[dict]:
+    owners = {str(OWNER_ID): "owner@example.com"}
+    return [note_response(note, owners) for note in note_documents()]
+
+
+@pytest.mark.parametrize("items, schema", [(tasks, TaskResponse), (notes, NoteResponse)], ids=["tasks", "notes"])
+def test_items_match_schema(items, schema):
+    TypeAdapter(list[schema]).validate_python(items())
+
+
+@pytest.mark.parametrize("items, schema", [(tasks, TaskResponse), (notes, NoteResponse)], ids=["tasks", "notes"])
+def test_json_response_matches_response_model(encoder, items, schema):
+    content = items()
+    assert json_response(content, list[schema]).body == response_model_body(content, list[schema])
+
+
+@pytest.mark.parametrize("items, schema", [(tasks, TaskResponse), (notes, NoteResponse)], ids=["tasks", "notes"])
+def test_encode_items_match_response_model(encoder, items, schema):
+    content = items()
+    streamed = b"[" + b",".join(encode_items(content, schema)) + b"]"
+    assert streamed == response_model_body(content, list[schema])
+    for item, encoded in zip(content, encode_items(content, schema)):
+        assert encoded == response_model_body(item, schema)
+
+
+def test_owner_email_falls_back_to_owner_lookup():
+    legacy = note_documents()[1]
+    assert note_response(legacy, {str(OWNER_ID): "owner@example.com"})["owner_email"] == "owner@example.com"
+    assert note_response(legacy, {})["owner_email"] is None
+
+
+def test_validation_rejects_schema_drift():
+    broken = tasks()
+    del broken[0]["title"]
+    with pytest.raises(Exception):
+        json_response(broken, list[TaskResponse])
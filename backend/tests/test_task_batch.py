@@ -0,0 +1,103 @@
+import pytest
+from bson import ObjectId
+
+from app.core.user_cache import user_cache
+from app.models.task import TaskModel
+
+from tests.conftest import auth_headers, create_user
+
+pytestmark = pytest.mark.anyio
+
+BATCH = "/api/v1/tasks:batch"
+UPDATE = {"title": "Renamed", "description": None, "status": "done"}
+
+
+async def insert_task(db, owner) -> ObjectId:
+    return (await db["tasks"].insert_one(TaskModel("Task", None, owner["_id"]).to_dict())).inserted_id
+
+
+def statuses(response) -> list[int]:
+    return [result["status"] for result in response.json()["results"]]
+
+
+async def test_batch_is_one_read_and_one_bulk_write(client, db, commands, alice, bob):
+    mine = [await insert_task(db, alice) for _ in range(3)]
+    theirs = await insert_task(db, bob)
+    commands.clear()
+
+    response = await client.post(BATCH, headers=auth_headers(alice), json={"operations": [
+        {"op": "create", "data": {"title": "New"}},
+        {"op": "update", "id": str(mine[0]), "data": UPDATE},
+        {"op": "delete", "id": str(mine[1])},
+        {"op": "delete", "id": str(mine[2])},
+        {"op": "delete", "id": str(theirs)},
+        {"op": "update", "id": str(ObjectId()), "data": UPDATE},
+    ]})
+
+    assert statuses(response) == [201, 200, 204, 204, 403, 404]
+    assert commands.on("tasks") == ["find", "bulk_write"]
+    assert await db["tombstones"].count_documents({}) == 2
+
+
+async def test_task_deleted_before_the_write_is_404(client, db, commands, alice):
+    updated, deleted = await insert_task(db, alice), await insert_task(db, alice)
+    kept = await insert_task(db, alice)
+    commands.clear()
+
+    def concurrent_delete():
+        db["tasks"].delegate.delete_many({"_id": {"$in": [updated, deleted]}})
+
+    commands.before("tasks", "bulk_write", concurrent_delete)
+    response = await client.post(BATCH, headers=auth_headers(alice), json={"operations": [
+        {"op": "update", "id": str(updated), "data": UPDATE},
+        {"op": "delete", "id": str(deleted)},
+        {"op": "delete", "id": str(kept)},
+    ]})
+
+    # one of the three missing tasks was ours, but which can't be told apart: all report 404
+    assert statuses(response) == [404, 404, 404]
+    assert commands.on("tasks") == ["find", "bulk_write", "find"]
+    assert await db["tasks"].count_documents({}) == 0
+    # every deleted task is tombstoned, so synced clients drop it either way
+    assert {t["doc_id"] for t in await db["tombstones"].find({}).to_list(None)} == {deleted, kept}
+
+
+async def test_task_reassigned_before_the_write_is_403(client, db, commands, alice, bob):
+    updated, deleted = await insert_task(db, alice), await insert_task(db, alice)
+    kept = await insert_task(db, alice)
+    commands.clear()
+
+    def concurrent_reassign():
+        db["tasks"].delegate.update_many({"_id": {"$in": [updated, deleted]}}, {"$set": {"owner_id": bob["_id"]}})
+
+    commands.before("tasks", "bulk_write", concurrent_reassign)
+    response = await client.post(BATCH, headers=auth_headers(alice), json={"operations": [
+        {"op": "update", "id": str(updated), "data": UPDATE},
+        {"op": "delete", "id": str(deleted)},
+        {"op": "delete", "id": str(kept)},
+    ]})
+
+    assert statuses(response) == [403, 403, 204]
+    # only the delete that happened leaves a tombstone
+    assert [t["doc_id"] for t in await db["tombstones"].find({}).to_list(None)] == [kept]
+    assert (await db["tasks"].find_one({"_id": updated}))["title"] == "Task"
+
+
+async def test_admin_assignees_resolved_in_one_query(client, db, commands, bob):
+    admin = await create_user(db, "admin@example.com", role="admin")
+    carol = await create_user(db, "carol@example.com")
+    user_cache.clear()  # force the lookups to hit the database
+    commands.clear()
+
+    response = await client.post(BATCH, headers=auth_headers(admin), json={"operations": [
+        {"op": "create", "data": {"title": "A", "assignee_id": "bob@example.com"}},
+        {"op": "create", "data": {"title": "B", "assignee_id": "carol@example.com"}},
+        {"op": "create", "data": {"title": "C", "assignee_id": "nobody@example.com"}},
+        {"op": "create", "data": {"title": "D", "assignee_id": str(carol["_id"])}},
+        {"op": "create", "data": {"title": "E", "assignee_id": "not-an-id"}},
+    ]})
+
+    assert statuses(response) == [201, 201, 404, 201, 400]
+    # the admin itself, then one $in for every email; carol's id is then served from the cache
+    assert commands.on("users") == ["find_one", "find"]
+    assert commands.on("tasks") == ["bulk_write"]